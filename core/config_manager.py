@@ -88,6 +88,9 @@ class ConfigManager:
         self.security = SecurityManager()
         self.password_vault = MasterPasswordVault()
         self._secure_master_password = None
+        # True cuando la clave activa de self.security se derivó de la contraseña
+        # maestra actual: save_config_data la reutiliza sin repetir PBKDF2.
+        self._security_key_matches_master = False
         self._secure_vault_password_cache = None
         self._vault_password_loaded = False
         self._config_loaded = False
@@ -102,6 +105,8 @@ class ConfigManager:
         if not password:
             self._clear_master_password()
             return
+        if password != self._get_master_password():
+            self._security_key_matches_master = False
         if self._secure_master_password is None:
             self._secure_master_password = SecureString(password)
             return
@@ -117,6 +122,11 @@ class ConfigManager:
         if self._secure_master_password:
             self._secure_master_password.clear()
         self._secure_master_password = None
+        self._security_key_matches_master = False
+
+    def _mark_security_key(self, password):
+        """Registrar si la clave activa (derivada de password) es la de la contraseña maestra."""
+        self._security_key_matches_master = bool(password) and password == self._get_master_password()
 
     def _set_vault_password_cache(self, password):
         """Guardar cache del vault en buffer mutable."""
@@ -201,16 +211,19 @@ class ConfigManager:
         """
         Si se abrió con clave legacy y existe una clave nueva, recifrar config.enc
         automáticamente con la clave nueva.
+
+        Devuelve None si no aplica migración; si no, True o False según el resultado.
         """
         legacy_password = os.getenv(LEGACY_MASTER_PASSWORD_ENV)
         target_password = os.getenv(MASTER_PASSWORD_ENV)
 
         if not (legacy_password and target_password):
-            return
+            return None
 
         if used_password != legacy_password or legacy_password == target_password:
-            return
+            return None
 
+        self._security_key_matches_master = False
         migrated = self.security.encrypt_config_file(
             decrypted_config,
             target_password,
@@ -218,9 +231,11 @@ class ConfigManager:
         )
         if migrated:
             self._set_master_password(target_password)
+            self._mark_security_key(target_password)
             logger.info("Migracion de clave maestra completada usando variable de entorno.")
-        else:
-            logger.warning("No se pudo migrar config.enc a la nueva clave maestra.")
+            return True
+        logger.warning("No se pudo migrar config.enc a la nueva clave maestra.")
+        return False
 
     def _request_master_password(self, is_first_time=False):
         """Solicitar contraseña maestra y preferencia de guardado local."""
@@ -267,11 +282,14 @@ class ConfigManager:
             
             for pwd in passwords_to_try:
                 try:
+                    self._security_key_matches_master = False
                     config = self.security.decrypt_config_file(pwd, self.encrypted_config_file)
                     if config:
-                        self._migrate_master_password_if_needed(config, pwd)
+                        migrated = self._migrate_master_password_if_needed(config, pwd)
                         if not self._get_master_password():
                             self._set_master_password(pwd)
+                        if migrated is None:
+                            self._mark_security_key(pwd)
                         self._config_loaded = True
                         logger.info("✅ Configuración cargada desde 'config.enc' en USB.")
                         return config
@@ -287,8 +305,10 @@ class ConfigManager:
             prompted_password, remember_choice = self._request_master_password(is_first_time=False)
             if prompted_password and prompted_password not in passwords_to_try:
                 try:
+                    self._security_key_matches_master = False
                     config = self.security.decrypt_config_file(prompted_password, self.encrypted_config_file)
                     if config:
+                        self._mark_security_key(prompted_password)
                         self._apply_vault_preference(prompted_password, remember_choice)
                         self._config_loaded = True
                         logger.info("Configuración cargada desde 'config.enc' con contraseña manual.")
@@ -326,13 +346,16 @@ class ConfigManager:
                 return False
             self._set_master_password(password)
         
+        # Si la clave activa ya es la de la contraseña maestra (p. ej. tras cargar
+        # config.enc) se reutiliza; si no, encrypt_config_file la deriva.
         success = self.security.encrypt_config_file(
             config,
-            self._get_master_password(),
+            None if self._security_key_matches_master else self._get_master_password(),
             self.encrypted_config_file,
         )
         
         if success:
+            self._mark_security_key(self._get_master_password())
             self._apply_vault_preference(self._get_master_password(), remember_choice)
             self._config_loaded = True
             logger.info(f"✅ Guardado exitoso en: {self.encrypted_config_file}")
@@ -3,6 +3,7 @@ Sistema Unificado de Excepciones y Manejo de Errores para Driver Manager
 Proporciona excepciones específicas y decoradores para manejo consistente
 """
 
+import re
 from functools import wraps
 from typing import Any, Callable, Optional, Tuple, TypeVar, Dict
 from core.logger import get_logger
@@ -408,6 +409,23 @@ def validate_min_length(value: str, min_length: int, field_name: str = "value"):
         )
 
 
+USERNAME_PATTERN = re.compile(r"[a-zA-Z0-9_-]+")
+
+
+def is_valid_username(username: str) -> bool:
+    """Verificar que el nombre de usuario solo use letras, números, guiones y guion bajo"""
+    return bool(USERNAME_PATTERN.fullmatch(username or ""))
+
+
+def validate_username(username: str, field_name: str = "username"):
+    """Validar caracteres permitidos en un nombre de usuario"""
+    if not is_valid_username(username):
+        raise ValidationError(
+            "Nombre de usuario invalido (solo letras, numeros, guiones y guiones bajos).",
+            details={field_name: username}
+        )
+
+
 def validate_file_exists(path, field_name: str = "file"):
     """Validar que un archivo existe"""
     from pathlib import Path
@@ -0,0 +1,54 @@
+"""
+Serializacion JSON compartida para persistencia de usuarios y logs.
+
+Usa orjson cuando esta instalado y cae a la libreria estandar si no lo esta.
+Ambas rutas trabajan con bytes UTF-8 para que los llamadores no dependan
+del backend disponible.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serializar a bytes UTF-8 compactos (o con indentacion de 2 espacios si se pide)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(obj: Any, indent: bool = False) -> str:
+    """Serializar a texto, para APIs que esperan str (p. ej. subidas a la nube)."""
+    return dumps(obj, indent=indent).decode("utf-8")
+
+
+def loads(content: bytes | str) -> Any:
+    """Parsear bytes o texto JSON tolerando BOM UTF-8 al inicio."""
+    if isinstance(content, str):
+        if content.startswith("\ufeff"):
+            content = content[1:]
+    elif content[:3] == _UTF8_BOM:
+        if orjson is not None:
+            # orjson acepta memoryview: se evita copiar el blob completo para saltar 3 bytes.
+            return orjson.loads(memoryview(content)[3:])
+        content = content[3:]
+
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -14,6 +14,12 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+try:
+    from rfernet import Fernet as RustFernet
+except ImportError:  # rfernet es opcional; cryptography cubre el mismo formato
+    RustFernet = None
+
+from core import json_codec
 from core.logger import get_logger
 from core.exceptions import (
     handle_errors,
@@ -25,6 +31,13 @@ from core.exceptions import (
 logger = get_logger()
 
 
+def build_fernet(key: bytes):
+    """Construir cifrador Fernet, usando rfernet (Rust) si esta instalado."""
+    if RustFernet is not None:
+        return RustFernet(key.decode("ascii") if isinstance(key, bytes) else key)
+    return Fernet(key)
+
+
 class SecurityManager:
     """Gestor de seguridad con cifrado AES-256 y HMAC"""
     
@@ -104,7 +117,7 @@ class SecurityManager:
                 logger.warning(f"No se pudo ocultar el archivo salt: {e}")
         
         self.master_key = self._derive_key(password, salt)
-        self.fernet = Fernet(self.master_key)
+        self.fernet = build_fernet(self.master_key)
         logger.info("Clave maestra inicializada correctamente.")
         logger.operation_end("initialize_master_key", success=True)
         return True
@@ -115,8 +128,7 @@ class SecurityManager:
         if not self.fernet:
             raise SecurityError("Clave maestra no inicializada para cifrado.")
         
-        json_data = json.dumps(data, separators=(',', ':'))
-        encrypted = self.fernet.encrypt(json_data.encode())
+        encrypted = self.fernet.encrypt(json_codec.dumps(data))
         return base64.urlsafe_b64encode(encrypted).decode()
     
     @handle_errors("decrypt_data")
@@ -128,7 +140,7 @@ class SecurityManager:
         try:
             encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
             decrypted = self.fernet.decrypt(encrypted_bytes)
-            return json.loads(decrypted.decode())
+            return json_codec.loads(decrypted)
         except Exception as e:
             raise SecurityError("Fallo el descifrado. La clave puede ser incorrecta o los datos están corruptos.", original_error=e)
     
@@ -151,10 +163,18 @@ class SecurityManager:
         return hmac.compare_digest(calculated_hmac, expected_hmac)
     
     @handle_errors("encrypt_config_file", reraise=False, default_return=False)
-    def encrypt_config_file(self, config_data: dict, password: str, file_path: Path = None) -> bool:
-        """Cifrar archivo de configuración"""
+    def encrypt_config_file(self, config_data: dict, password: str = None, file_path: Path = None) -> bool:
+        """
+        Cifrar archivo de configuración.
+
+        Con password=None se reutiliza la clave maestra ya inicializada (p. ej. tras
+        decrypt_config_file) en vez de repetir PBKDF2 con la misma contraseña.
+        """
         logger.operation_start("encrypt_config_file", file_path=str(file_path))
-        if not self.initialize_master_key(password):
+        if password is None:
+            if not self.fernet:
+                raise SecurityError("Clave maestra no inicializada para cifrado.")
+        elif not self.initialize_master_key(password):
             return False
         
         if file_path is None:
@@ -272,7 +292,7 @@ class SecurityManager:
             import shutil
             shutil.copy2(legacy_salt_file, current_salt_file)
             self.master_key = derived_key
-            self.fernet = Fernet(derived_key)
+            self.fernet = build_fernet(derived_key)
             return True
         except (OSError, ValueError, TypeError) as e:
             logger.error(f"No se pudo aplicar salt recuperado: {e}")
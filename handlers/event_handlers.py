@@ -4,8 +4,8 @@ Manejadores de eventos para Driver Manager
 
 import os
 import json
+import time
 from pathlib import Path
-from datetime import datetime
 from PyQt6.QtWidgets import (QMessageBox, QInputDialog, QFileDialog, 
                              QListWidgetItem, QGroupBox, QLineEdit)
 from PyQt6.QtCore import Qt
@@ -53,11 +53,16 @@ class EventHandlers:
             except (TypeError, ValueError):
                 size_text = 'N/A'
 
-            details = f"Marca: {driver['brand']}\n"
-            details += f"Versión: {driver['version']}\n"
-            details += f"Descripción: {driver.get('description', 'N/A')}\n"
-            details += f"Fecha: {driver.get('last_modified', 'N/A')}\n"
-            details += f"Tamaño: {size_text} MB"
+            details = "\n".join(
+                f"{label}: {value}"
+                for label, value in (
+                    ("Marca", driver['brand']),
+                    ("Versión", driver['version']),
+                    ("Descripción", driver.get('description', 'N/A')),
+                    ("Fecha", driver.get('last_modified', 'N/A')),
+                    ("Tamaño", f"{size_text} MB"),
+                )
+            )
 
             self.main.drivers_tab.driver_details.setText(details)
             if hasattr(self.main.drivers_tab, "detail_state_label"):
@@ -155,12 +160,19 @@ class EventHandlers:
                 f"Driver descargado en:\n{file_path}"
             )
     
+    def _elapsed_installation_seconds(self):
+        """Segundos enteros desde el inicio de la instalación (reloj monotónico)"""
+        start_time = self.main.installation_start_time
+        if start_time is None:
+            return None
+        return int(time.monotonic() - start_time)
+
     def _install_driver(self, file_path, driver, client_name):
         """Instalar driver y registrar en historial"""
         logger.operation_start("install_driver", 
         driver=driver['brand'], 
         version=driver['version'])
-        self.main.installation_start_time = datetime.now()
+        self.main.installation_start_time = time.monotonic()
         
         try:
             # Leer hash esperado
@@ -173,10 +185,7 @@ class EventHandlers:
 
             self.main.installer.install_driver(file_path, expected_hash=expected_hash)
             
-            installation_time = None
-            if self.main.installation_start_time:
-                time_diff = datetime.now() - self.main.installation_start_time
-                installation_time = int(time_diff.total_seconds())
+            installation_time = self._elapsed_installation_seconds()
             
             success = self.main.history.add_installation(
                 driver_brand=driver['brand'],
@@ -219,10 +228,7 @@ class EventHandlers:
         """Manejar errores de instalación"""
         error_msg = str(error)
         
-        installation_time = None
-        if self.main.installation_start_time:
-            time_diff = datetime.now() - self.main.installation_start_time
-            installation_time = int(time_diff.total_seconds())
+        installation_time = self._elapsed_installation_seconds()
         
         self.main.history.add_installation(
             driver_brand=driver['brand'],
@@ -279,63 +279,21 @@ class ReportHandlers:
             )
 
             if file_path:
+                separator = "=" * 80
+                header = (
+                    f"{separator}\n"
+                    "LOG DE AUDITORÍA - DRIVER MANAGER\n"
+                    f"Exportado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+                    f"{separator}\n\n"
+                )
+                entries = [
+                    self._format_audit_log_entry(log)
+                    for log in logs
+                    if isinstance(log, dict)
+                ]
+                # Un solo write con todo el contenido ya armado
                 with open(file_path, "w", encoding="utf-8") as f:
-                    f.write("=" * 80 + "\n")
-                    f.write("LOG DE AUDITORÍA - DRIVER MANAGER\n")
-                    f.write(f"Exportado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                    f.write("=" * 80 + "\n\n")
-
-                    for log in logs:
-                        if not isinstance(log, dict):
-                            continue
-
-                        timestamp_value = self._extract_timestamp_value(log)
-                        timestamp_text = self._format_timestamp_value(timestamp_value)
-                        username = log.get("username") or log.get("user") or "N/A"
-                        action = log.get("action") or "N/A"
-                        success_value = log.get("success")
-                        if success_value is True:
-                            success_text = "OK"
-                        elif success_value is False:
-                            success_text = "ERROR"
-                        else:
-                            success_text = "N/A"
-
-                        details = log.get("details", {})
-                        if isinstance(details, (dict, list)):
-                            details_text = json.dumps(details, ensure_ascii=False)
-                        else:
-                            details_text = str(details)
-
-                        system_info = log.get("system_info") or {}
-                        if not isinstance(system_info, dict):
-                            system_info = {}
-
-                        computer_name = (
-                            log.get("computer_name")
-                            or system_info.get("computer_name")
-                            or "N/A"
-                        )
-                        ip_address = (
-                            log.get("ip_address")
-                            or system_info.get("ip")
-                            or "N/A"
-                        )
-                        platform_name = (
-                            log.get("platform")
-                            or system_info.get("platform")
-                            or "N/A"
-                        )
-
-                        f.write(f"Fecha: {timestamp_text}\n")
-                        f.write(f"Usuario: {username}\n")
-                        f.write(f"Acción: {action}\n")
-                        f.write(f"Resultado: {success_text}\n")
-                        f.write(f"Detalles: {details_text}\n")
-                        f.write(f"Computadora: {computer_name}\n")
-                        f.write(f"IP: {ip_address}\n")
-                        f.write(f"Plataforma: {platform_name}\n")
-                        f.write("-" * 80 + "\n\n")
+                    f.write(header + "".join(entries))
 
                 QMessageBox.information(
                     self.main,
@@ -367,6 +325,58 @@ class ReportHandlers:
 
         return []
 
+    def _format_audit_log_entry(self, log):
+        """Formatear un registro de auditoría como bloque de texto para exportar."""
+        timestamp_value = self._extract_timestamp_value(log)
+        timestamp_text = self._format_timestamp_value(timestamp_value)
+        username = log.get("username") or log.get("user") or "N/A"
+        action = log.get("action") or "N/A"
+        success_value = log.get("success")
+        if success_value is True:
+            success_text = "OK"
+        elif success_value is False:
+            success_text = "ERROR"
+        else:
+            success_text = "N/A"
+
+        details = log.get("details", {})
+        if isinstance(details, (dict, list)):
+            details_text = json.dumps(details, ensure_ascii=False)
+        else:
+            details_text = str(details)
+
+        system_info = log.get("system_info") or {}
+        if not isinstance(system_info, dict):
+            system_info = {}
+
+        computer_name = (
+            log.get("computer_name")
+            or system_info.get("computer_name")
+            or "N/A"
+        )
+        ip_address = (
+            log.get("ip_address")
+            or system_info.get("ip")
+            or "N/A"
+        )
+        platform_name = (
+            log.get("platform")
+            or system_info.get("platform")
+            or "N/A"
+        )
+
+        return (
+            f"Fecha: {timestamp_text}\n"
+            f"Usuario: {username}\n"
+            f"Acción: {action}\n"
+            f"Resultado: {success_text}\n"
+            f"Detalles: {details_text}\n"
+            f"Computadora: {computer_name}\n"
+            f"IP: {ip_address}\n"
+            f"Plataforma: {platform_name}\n"
+            f"{'-' * 80}\n\n"
+        )
+
     def _extract_timestamp_value(self, log):
         """Extraer timestamp tolerando variantes legacy de clave."""
         direct_value = log.get("timestamp")
@@ -600,16 +600,29 @@ class CloudflareR2Manager:
         logger.operation_end("upload_file_content", success=True)
         return True
     
+    @handle_errors("get_file_etag", reraise=True)
+    def get_file_etag(self, key):
+        """Obtener ETag de un archivo en R2 sin descargarlo (None si no existe)"""
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise CloudStorageError(f"Error al consultar metadata del archivo: {e.response['Error']['Message']}", original_error=e)
+        return str(response.get('ETag') or '').strip('"') or None
+
     @handle_errors("download_file_content", reraise=True)
-    def download_file_content(self, key):
-        """Descargar contenido de archivo desde R2"""
+    def download_file_content(self, key, binary=False):
+        """Descargar contenido de archivo desde R2 (bytes crudos si binary=True)"""
         logger.operation_start("download_file_content", key=key)
         try:
             response = self.s3_client.get_object(
                 Bucket=self.bucket_name,
                 Key=key
             )
-            content = response['Body'].read().decode('utf-8')
+            content = response['Body'].read()
+            if not binary:
+                content = content.decode('utf-8')
             logger.operation_end("download_file_content", success=True)
             return content
         except ClientError as e:
@@ -29,7 +29,7 @@ class DownloadThread(QThread):
             self.driver_backend.download_driver(
                 self.driver_key, 
                 self.local_path,
-                progress_callback=lambda p: self.progress.emit(p)
+                progress_callback=self.progress.emit
             )
             
             # Calcular y guardar hash
@@ -78,7 +78,7 @@ class UploadThread(QThread):
                 self.brand,
                 self.version,
                 self.description,
-                progress_callback=lambda p: self.progress.emit(p)
+                progress_callback=self.progress.emit
             )
             logger.operation_end("upload_driver_thread", success=True)
             self.finished.emit(upload_info)
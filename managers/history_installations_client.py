@@ -8,6 +8,14 @@ mantener el manager como fachada de compatibilidad.
 import platform
 from datetime import datetime
 
+from core import json_codec
+from core.logger import get_logger
+
+logger = get_logger()
+
+# Maximo que acepta el Worker por pagina en /installations.
+INSTALLATIONS_PAGE_SIZE = 500
+
 
 class HistoryInstallationsClient:
     """Cliente liviano para endpoints de instalaciones y estadisticas."""
@@ -33,9 +41,13 @@ class HistoryInstallationsClient:
  
     def create_installation(self, installation_data):
         payload = self.build_installation_payload(installation_data)
-        self._request("post", "installations", json=payload)
+        self.post_installation_payload(payload)
         return payload
 
+    def post_installation_payload(self, payload):
+        """Enviar un payload ya normalizado por build_installation_payload."""
+        self._request("post", "installations", json=payload)
+
     def build_manual_record_payload(self, record_data):
         return {
             "timestamp": record_data.get("timestamp") or datetime.now().isoformat(),
@@ -56,14 +68,48 @@ class HistoryInstallationsClient:
  
     def create_manual_record(self, record_data):
         payload = self.build_manual_record_payload(record_data)
+        return payload, self.post_manual_record_payload(payload)
+
+    def post_manual_record_payload(self, payload):
+        """Enviar un payload ya normalizado por build_manual_record_payload."""
         response = self._request("post", "records", json=payload)
         if isinstance(response, dict):
-            return payload, response.get("record")
-        return payload, None
+            return response.get("record")
+        return None
 
     def list_installations(self, params=None):
         return self._request("get", "installations", params=params) or []
 
+    def iter_installation_pages(self, params=None, page_size=INSTALLATIONS_PAGE_SIZE):
+        """Recorrer /installations pagina a pagina siguiendo el cursor X-Next-Cursor."""
+        page_params = dict(params or {})
+        page_params["limit"] = page_size
+        seen_cursors = set()
+
+        while True:
+            response = self._request("get", "installations", params=page_params, expect_json=False)
+            if response is None or isinstance(response, list):
+                # Request function que ya devuelve JSON: no hay cabeceras de paginacion.
+                yield response or []
+                return
+
+            yield (json_codec.loads(response.content) if response.content else None) or []
+
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                return
+            if next_cursor in seen_cursors:
+                # Un cursor repetido cortaria el recorrido: el reporte quedaria incompleto.
+                logger.warning(
+                    "Cursor de paginacion repetido en /installations; se detiene el recorrido "
+                    "y los datos pueden estar incompletos.",
+                    cursor=next_cursor,
+                    pages_read=len(seen_cursors) + 1,
+                )
+                return
+            seen_cursors.add(next_cursor)
+            page_params["cursor"] = next_cursor
+
     def get_installation_by_id(self, normalized_record_id):
         return self._request("get", f"installations/{normalized_record_id}")
 
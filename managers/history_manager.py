@@ -159,25 +159,30 @@ class InstallationHistory:
         """Calcular estadísticas base a partir de la lista de instalaciones."""
         normalized_installations = installations or []
         total = len(normalized_installations)
-        success = len(
-            [inst for inst in normalized_installations if str(inst.get('status', '')).lower() == 'success']
-        )
-        failed = len(
-            [inst for inst in normalized_installations if str(inst.get('status', '')).lower() == 'failed']
-        )
-        success_rate = round((success / total) * 100, 2) if total else 0
 
-        valid_seconds = []
+        # Estado y tiempos en una sola pasada, con acumuladores escalares.
+        success = 0
+        failed = 0
+        seconds_total = 0.0
+        seconds_count = 0
         for inst in normalized_installations:
+            status = str(inst.get('status', '')).lower()
+            if status == 'success':
+                success += 1
+            elif status == 'failed':
+                failed += 1
+
             raw_value = inst.get('installation_time_seconds')
             if raw_value in (None, ''):
                 continue
             try:
-                valid_seconds.append(float(raw_value))
+                seconds_total += float(raw_value)
             except (TypeError, ValueError):
                 continue
+            seconds_count += 1
 
-        average_time_minutes = round((sum(valid_seconds) / len(valid_seconds)) / 60, 2) if valid_seconds else 0
+        success_rate = round((success / total) * 100, 2) if total else 0
+        average_time_minutes = round((seconds_total / seconds_count) / 60, 2) if seconds_count else 0
 
         unique_clients = len(
             {
@@ -187,18 +192,17 @@ class InstallationHistory:
             }
         )
 
-        top_drivers_counter = Counter()
-        by_brand_counter = Counter()
-        for inst in normalized_installations:
-            brand = (inst.get('driver_brand') or '').strip()
-            version = (inst.get('driver_version') or '').strip()
-
-            if brand:
-                by_brand_counter[brand] += 1
-
-            driver_key = f"{brand} {version}".strip()
-            if driver_key:
-                top_drivers_counter[driver_key] += 1
+        # Counter(iterable) cuenta en C; evita el `counter[k] += 1` por fila.
+        brands_and_versions = [
+            ((inst.get('driver_brand') or '').strip(), (inst.get('driver_version') or '').strip())
+            for inst in normalized_installations
+        ]
+        by_brand_counter = Counter(brand for brand, _ in brands_and_versions if brand)
+        top_drivers_counter = Counter(
+            driver_key
+            for driver_key in (f"{brand} {version}".strip() for brand, version in brands_and_versions)
+            if driver_key
+        )
 
         return {
             'total_installations': total,
@@ -689,7 +693,7 @@ class InstallationHistory:
         self._save_local(payload)
 
         try:
-            self.installations_client.create_installation(payload)
+            self.installations_client.post_installation_payload(payload)
             logger.info("Installation record synced to cloud successfully")
             return True
             
@@ -713,7 +717,7 @@ class InstallationHistory:
         self._save_local(payload)
 
         try:
-            _saved_payload, record = self.installations_client.create_manual_record(payload)
+            record = self.installations_client.post_manual_record_payload(payload)
             return True, record
         except ConnectionError as e:
             logger.warning(f"Could not create manual record in cloud: {e}")
@@ -757,6 +761,16 @@ class InstallationHistory:
             return []
 
         try:
+            if not limit:
+                # Sin limite se recorren todas las paginas; el Worker corta en 100 por defecto.
+                return list(self.iter_installations(
+                    client_name=client_name,
+                    brand=brand,
+                    status=status,
+                    start_date=start_date,
+                    end_date=end_date,
+                ))
+
             installations = self.installations_client.list_installations(params=params)
             return self._apply_local_filters(
                 installations,
@@ -771,6 +785,46 @@ class InstallationHistory:
             logger.error(f"Could not retrieve installation history: {e}")
             return []
     
+    def iter_installations(self, client_name=None, brand=None, status=None,
+                           start_date=None, end_date=None):
+        """
+        Recorrer instalaciones página a página sin cargar todo el historial.
+        
+        Args:
+            client_name: Filtrar por nombre de cliente
+            brand: Filtrar por marca
+            status: Filtrar por estado
+            start_date: Fecha inicio (ISO format)
+            end_date: Fecha fin (ISO format)
+            
+        Yields:
+            dict: Instalación que cumple los filtros
+        """
+        params = {}
+        if client_name:
+            params['client_name'] = client_name
+        if brand:
+            params['brand'] = brand
+        if status:
+            params['status'] = status
+        if start_date:
+            params['start_date'] = start_date
+        if end_date:
+            params['end_date'] = end_date
+
+        if self._requires_web_session():
+            return
+
+        for page in self.installations_client.iter_installation_pages(params=params):
+            yield from self._apply_local_filters(
+                page,
+                client_name=client_name,
+                brand=brand,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+            )
+    
     def get_installation_by_id(self, record_id):
         """
         Obtener una instalación por su ID desde la API.
@@ -15,6 +15,7 @@ import time
 
 import requests
 
+from core import json_codec
 from core.logger import get_logger
 
 logger = get_logger()
@@ -36,6 +37,8 @@ class HistoryRequestAdapter:
             os.getenv("DRIVER_MANAGER_ALLOW_UNSIGNED_REQUESTS", "")
         ).strip().lower() in {"1", "true", "yes", "on"}
         self.timeout = timeout
+        # Sesion persistente: reutiliza conexiones keep-alive/TLS hacia el Worker.
+        self._session = requests.Session()
 
         self._initialize_api_config()
 
@@ -368,7 +371,7 @@ class HistoryRequestAdapter:
                     )
 
         try:
-            response = requests.request(
+            response = self._session.request(
                 method,
                 url,
                 headers=headers,
@@ -378,7 +381,7 @@ class HistoryRequestAdapter:
             )
             response.raise_for_status()
             if expect_json:
-                return response.json() if response.content else None
+                return json_codec.loads(response.content) if response.content else None
             return response
 
         except requests.exceptions.Timeout:
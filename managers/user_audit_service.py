@@ -1,16 +1,58 @@
+import atexit
+import hashlib
 import json
 import os
+import threading
 import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from itertools import islice
 
+from core import json_codec
 from core.exceptions import AuthenticationError, handle_errors, returns_result_tuple
 
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: solo hace falta para leer blobs msgpack
+    msgpack = None
+
+
+# Servicios con logs en buffer: un solo hook de salida los persiste sin retenerlos vivos.
+_LIVE_AUDIT_SERVICES = weakref.WeakSet()
+
+
+def _flush_live_audit_services():
+    for service in list(_LIVE_AUDIT_SERVICES):
+        try:
+            service.flush_pending_logs()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_live_audit_services)
+
 
 class UserAuditService:
     """Servicio de auditoria/access logs para UserManagerV2."""
 
+    LOG_FLUSH_INTERVAL_SECONDS = 5.0
+    LOG_FLUSH_BATCH_SIZE = 50
+    LOG_BUFFER_MAX_ENTRIES = 1000
+    MAX_LOG_ENTRIES = 1000
+    _JSON_LEADING_BYTES = frozenset(b"{[ \t\r\n\xef")
+
     def __init__(self, owner):
         self.owner = owner
+        self._log_buffer = deque(maxlen=self.LOG_BUFFER_MAX_ENTRIES)
+        self._log_buffer_lock = threading.Lock()
+        self._log_flush_lock = threading.Lock()
+        self._log_flush_timer = None
+        self._logs_cache = None
+        self._logs_cache_version = None
+        self._log_io_pool = None
+        self._pending_log_flushes = []
 
     def _get_system_info(self):
         return self.owner._get_system_info()
@@ -132,20 +174,32 @@ class UserAuditService:
             self.owner.logger.warning(
                 "Formato de logs invalido. Reinicializando estructura de logs."
             )
-            return {"logs": [], "created_at": datetime.now().isoformat()}
+            return {
+                "logs": deque(maxlen=self.MAX_LOG_ENTRIES),
+                "created_at": datetime.now().isoformat(),
+            }
+
+        logs = logs_data.get("logs")
+        if (
+            isinstance(logs, deque)
+            and logs.maxlen == self.MAX_LOG_ENTRIES
+            and "created_at" in logs_data
+        ):
+            # Ya normalizado (cache o salida de _decode_cloud_logs_payload).
+            return logs_data
 
         normalized = dict(logs_data)
-        logs = normalized.get("logs")
 
         if logs is None and isinstance(normalized.get("access_logs"), list):
             logs = normalized.get("access_logs")
             normalized["logs"] = logs
 
-        if not isinstance(logs, list):
+        if not isinstance(logs, (list, deque)):
             self.owner.logger.warning(
                 "Estructura de logs corrupta o incompatible. Se usara lista vacaa."
             )
-            normalized["logs"] = []
+            logs = []
+        normalized["logs"] = deque(logs, maxlen=self.MAX_LOG_ENTRIES)
 
         if "created_at" not in normalized:
             normalized["created_at"] = datetime.now().isoformat()
@@ -190,7 +244,7 @@ class UserAuditService:
                     decrypted_blob = self.owner.security_manager.decrypt_data(encrypted_blob)
                     if isinstance(decrypted_blob, list):
                         self.owner.logger.warning(
-                            f"Recuperacian best-effort aplicada para '{field_name}' con HMAC invalido."
+                            f"Recuperacian best-effort aplicada para '{field_name}' con HMAC de payload invalido."
                         )
                         return self._normalize_logs_data(
                             {
@@ -214,50 +268,122 @@ class UserAuditService:
         )
         return self._normalize_logs_data({}), fallback_recovered
 
+    def _invalidate_logs_cache(self):
+        self._logs_cache = None
+        self._logs_cache_version = None
+
+    def _remember_logs_cache(self, logs_data, version):
+        self._logs_cache = logs_data
+        self._logs_cache_version = version
+
+    def _content_version(self, content):
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.md5(content).hexdigest()
+
+    def _logs_storage_version(self):
+        """Version actual del almacenamiento de logs (mtime local o ETag de R2)."""
+        try:
+            if self.owner.local_mode:
+                stat = os.stat(self.owner.logs_file)
+                return (stat.st_mtime_ns, stat.st_size)
+
+            etag_getter = getattr(self.owner.cloud_manager, "get_file_etag", None)
+            if not callable(etag_getter):
+                return None
+            return etag_getter(self.owner.logs_file)
+        except FileNotFoundError:
+            return "missing"
+        except Exception as error:
+            self.owner.logger.warning(f"No se pudo consultar version de logs: {error}")
+            return None
+
+    def _load_logs_data(self):
+        """Devolver logs desde cache si el almacenamiento no cambio; si no, recargar."""
+        if self._logs_cache is not None:
+            version = self._logs_storage_version()
+            if version is not None and version == self._logs_cache_version:
+                return self._logs_cache
+        return self.owner._load_legacy_logs_data()
+
+    def _load_current_logs_data(self, force_reload=False):
+        """Persistir el buffer pendiente y devolver los logs vigentes del almacenamiento."""
+        self.flush_pending_logs()
+        if force_reload:
+            self._invalidate_logs_cache()
+        return self._load_logs_data()
+
+    def _decode_cloud_logs_content(self, content):
+        """Parsear blob de logs cloud en JSON (legacy) o msgpack segun el primer byte."""
+        if isinstance(content, (bytes, bytearray)) and content and content[0] not in self._JSON_LEADING_BYTES:
+            if msgpack is None:
+                raise ValueError("Blob de logs en formato msgpack, pero msgpack no esta instalado.")
+            return msgpack.unpackb(content, raw=False)
+        return json_codec.loads(content)
+
+    def _serializable_logs_data(self, logs_data):
+        return dict(logs_data, logs=list(logs_data.get("logs") or []))
+
     def _persist_logs_data(self, logs_data):
+        serializable_data = self._serializable_logs_data(logs_data)
         if self.owner.local_mode:
             temp_logs_file = self.owner.logs_file.with_suffix(f"{self.owner.logs_file.suffix}.tmp")
-            with open(temp_logs_file, "w", encoding="utf-8") as file:
-                json.dump(logs_data, file, indent=2)
+            with open(temp_logs_file, "wb") as file:
+                file.write(json_codec.dumps(serializable_data, indent=True))
             os.replace(temp_logs_file, self.owner.logs_file)
+            self._remember_logs_cache(logs_data, self._logs_storage_version())
             return
 
         if self.owner.cloud_encryption:
-            encrypted_logs = self.owner.cloud_encryption.encrypt_cloud_data(logs_data)
-            logs_content = json.dumps(encrypted_logs, indent=2)
+            encrypted_logs = self.owner.cloud_encryption.encrypt_cloud_data(serializable_data)
+            logs_content = json_codec.dumps_str(encrypted_logs)
         else:
-            logs_content = json.dumps(logs_data, indent=2)
+            logs_content = json_codec.dumps_str(serializable_data)
+
+        content_version = self._content_version(logs_content)
+        if self._logs_cache is not None and content_version == self._logs_cache_version:
+            # El blob remoto ya tiene exactamente este contenido.
+            self._remember_logs_cache(logs_data, content_version)
+            return
 
         self.owner.cloud_manager.upload_file_content(self.owner.logs_file, logs_content)
+        self._remember_logs_cache(logs_data, content_version)
 
     def _load_legacy_logs_data(self):
         logs_data = {"logs": [], "created_at": datetime.now().isoformat()}
+        loaded_version = None
 
         try:
             if self.owner.local_mode:
+                loaded_version = self._logs_storage_version()
                 if self.owner.logs_file.exists():
-                    with open(self.owner.logs_file, "r", encoding="utf-8-sig") as file:
-                        logs_data = json.load(file)
+                    with open(self.owner.logs_file, "rb") as file:
+                        logs_data = json_codec.loads(file.read())
             else:
-                logs_content = self.owner.cloud_manager.download_file_content(self.owner.logs_file)
+                logs_content = self.owner.cloud_manager.download_file_content(
+                    self.owner.logs_file,
+                    binary=True,
+                )
                 if logs_content:
-                    if isinstance(logs_content, bytes):
-                        logs_content = logs_content.decode("utf-8-sig")
-                    elif isinstance(logs_content, str):
-                        logs_content = logs_content.lstrip("\ufeff")
-                    cloud_payload = json.loads(logs_content)
+                    cloud_payload = self._decode_cloud_logs_content(logs_content)
+                    loaded_version = self._content_version(logs_content)
                     logs_data, recovered = self._decode_cloud_logs_payload(cloud_payload)
                     if recovered:
                         self.owner.logger.warning(
                             "Se recuperaron logs historicos con fallback; normalizando archivo."
                         )
                         self._persist_logs_data(logs_data)
+                        loaded_version = self._logs_cache_version
         except Exception as error:
+            loaded_version = None
             self.owner.logger.warning(
                 f"No se pudo leer logs legacy: {error}. Se usara estructura vacia."
             )
 
-        return self._normalize_logs_data(logs_data)
+        logs_data = self._normalize_logs_data(logs_data)
+        if loaded_version is not None:
+            self._remember_logs_cache(logs_data, loaded_version)
+        return logs_data
 
     def _log_entry_key(self, entry):
         details_blob = json.dumps(entry.get("details"), sort_keys=True, default=str)
@@ -272,7 +398,7 @@ class UserAuditService:
         )
 
     def _merge_logs_preserving_order(self, existing_logs, additional_logs):
-        merged_logs = list(existing_logs or [])
+        merged_logs = deque(existing_logs or [], maxlen=self.MAX_LOG_ENTRIES)
         seen_keys = {self._log_entry_key(item) for item in merged_logs if isinstance(item, dict)}
 
         for entry in additional_logs or []:
@@ -287,22 +413,25 @@ class UserAuditService:
         return merged_logs
 
     def _append_legacy_log_entry(self, log_entry):
-        target_key = self.owner._log_entry_key(log_entry)
+        return self._append_legacy_log_entries([log_entry])
+
+    def _append_legacy_log_entries(self, log_entries):
+        target_keys = {self.owner._log_entry_key(entry) for entry in log_entries}
 
         for attempt in range(self.owner.LEGACY_LOG_APPEND_RETRIES):
             try:
-                logs_data = self.owner._load_legacy_logs_data()
+                logs_data = dict(self._load_logs_data())
                 current_logs = logs_data.get("logs", [])
-                logs_data["logs"] = self.owner._merge_logs_preserving_order(current_logs, [log_entry])[-1000:]
+                logs_data["logs"] = self.owner._merge_logs_preserving_order(current_logs, log_entries)
                 self.owner._persist_logs_data(logs_data)
 
-                persisted = self.owner._load_legacy_logs_data()
+                persisted = self._load_logs_data()
                 persisted_keys = {
                     self.owner._log_entry_key(item)
                     for item in persisted.get("logs", [])
                     if isinstance(item, dict)
                 }
-                if target_key in persisted_keys:
+                if target_keys <= persisted_keys:
                     return True
             except Exception as error:
                 self.owner.logger.warning(
@@ -313,6 +442,98 @@ class UserAuditService:
 
         return False
 
+    def _buffer_legacy_log_entry(self, log_entry):
+        with self._log_buffer_lock:
+            # Con el buffer lleno, deque(maxlen) descarta la entrada mas antigua.
+            dropped_count = int(len(self._log_buffer) >= self.LOG_BUFFER_MAX_ENTRIES)
+            self._log_buffer.append(log_entry)
+            pending_count = len(self._log_buffer)
+            if pending_count < self.LOG_FLUSH_BATCH_SIZE:
+                self._schedule_log_flush()
+
+        if dropped_count:
+            self._warn_dropped_log_entries(dropped_count)
+        if pending_count >= self.LOG_FLUSH_BATCH_SIZE:
+            self._submit_background_flush()
+
+    def _warn_dropped_log_entries(self, dropped_count):
+        """Dejar rastro de entradas de auditoria descartadas por el tope del buffer."""
+        self.owner.logger.warning(
+            f"Buffer de logs de auditoria lleno ({self.LOG_BUFFER_MAX_ENTRIES}): "
+            f"se descartaron {dropped_count} entradas sin persistir.",
+            dropped_entries=dropped_count,
+        )
+
+    def _submit_background_flush(self):
+        """Persistir el lote en un hilo de I/O para no bloquear al llamador con la red."""
+        with self._log_buffer_lock:
+            if self._log_io_pool is None:
+                self._log_io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-io")
+            self._pending_log_flushes = [
+                future for future in self._pending_log_flushes if not future.done()
+            ]
+            self._pending_log_flushes.append(
+                self._log_io_pool.submit(self._flush_pending_logs_in_background)
+            )
+
+    def _schedule_log_flush(self):
+        # Llamar con _log_buffer_lock tomado.
+        if self._log_flush_timer is not None:
+            return
+
+        _LIVE_AUDIT_SERVICES.add(self)
+
+        timer = threading.Timer(self.LOG_FLUSH_INTERVAL_SECONDS, self._flush_pending_logs_in_background)
+        timer.daemon = True
+        self._log_flush_timer = timer
+        timer.start()
+
+    def _flush_pending_logs_in_background(self):
+        try:
+            return self._flush_log_buffer()
+        except Exception as error:
+            self.owner.logger.warning(f"Fallo flush diferido de logs de auditoria: {error}")
+            return False
+
+    def flush_pending_logs(self):
+        """Esperar los flush en segundo plano y persistir lo que quede en el buffer."""
+        with self._log_buffer_lock:
+            pending_flushes = list(self._pending_log_flushes)
+            self._pending_log_flushes = []
+        if pending_flushes:
+            wait(pending_flushes)
+        return self._flush_log_buffer()
+
+    def _flush_log_buffer(self):
+        """Persistir en un solo append los logs legacy acumulados en memoria."""
+        with self._log_flush_lock:
+            with self._log_buffer_lock:
+                if self._log_flush_timer is not None:
+                    self._log_flush_timer.cancel()
+                    self._log_flush_timer = None
+                pending_entries = list(self._log_buffer)
+                self._log_buffer.clear()
+
+            if not pending_entries:
+                return True
+
+            persisted = self.owner._append_legacy_log_entries(pending_entries)
+            if not persisted:
+                self.owner.logger.warning(
+                    "No se pudo confirmar persistencia de logs tras reintentos; se reintentara en el proximo flush."
+                )
+                with self._log_buffer_lock:
+                    requeued_entries = pending_entries + list(self._log_buffer)
+                    self._log_buffer = deque(
+                        requeued_entries,
+                        maxlen=self.LOG_BUFFER_MAX_ENTRIES,
+                    )
+                    self._schedule_log_flush()
+                dropped_count = len(requeued_entries) - self.LOG_BUFFER_MAX_ENTRIES
+                if dropped_count > 0:
+                    self._warn_dropped_log_entries(dropped_count)
+            return persisted
+
     @returns_result_tuple("repair_access_logs")
     def repair_access_logs(self):
         self.owner.logger.operation_start("repair_access_logs")
@@ -324,8 +545,13 @@ class UserAuditService:
             self.owner.logger.operation_end("repair_access_logs", success=True, mode="audit_api")
             return True, "Auditoria en D1 activa. No se requiere reparacion de archivo local."
 
-        logs_data = self._load_legacy_logs_data()
-        self._persist_logs_data(logs_data)
+        # Persistir primero el buffer (toma _log_flush_lock) y luego releer y reescribir
+        # con el lock tomado, para que un flush concurrente no quede pisado.
+        self.flush_pending_logs()
+        with self._log_flush_lock:
+            self._invalidate_logs_cache()
+            logs_data = self._load_logs_data()
+            self._persist_logs_data(logs_data)
 
         total_logs = len(logs_data.get("logs", []))
         self.owner.logger.operation_end("repair_access_logs", success=True, total_logs=total_logs)
@@ -370,10 +596,8 @@ class UserAuditService:
                 self.owner.logger.operation_end("_log_access", success=True, mode="audit_api")
                 return
 
-            persisted = self._append_legacy_log_entry(log_entry)
-            if not persisted:
-                self.owner.logger.warning("No se pudo confirmar persistencia del log tras reintentos.")
-            self.owner.logger.operation_end("_log_access", success=persisted, mode="legacy_storage")
+            self._buffer_legacy_log_entry(log_entry)
+            self.owner.logger.operation_end("_log_access", success=True, mode="legacy_buffered")
         except Exception as error:
             self.owner.logger.error(f"Critical failure logging access: {error}", exc_info=True)
             self.owner.logger.operation_end("_log_access", success=False, reason=str(error))
@@ -412,32 +636,11 @@ class UserAuditService:
                 )
                 return normalized_rows
 
-            if self.owner.local_mode:
-                if not self.owner.logs_file.exists():
-                    return []
-                with open(self.owner.logs_file, "r") as file:
-                    logs_data = json.load(file)
-            else:
-                logs_content = self.owner.cloud_manager.download_file_content(self.owner.logs_file)
-                if not logs_content:
-                    return []
-
-                if isinstance(logs_content, bytes):
-                    logs_content = logs_content.decode("utf-8-sig")
-                elif isinstance(logs_content, str):
-                    logs_content = logs_content.lstrip("\ufeff")
-                cloud_payload = json.loads(logs_content)
-                logs_data, recovered = self._decode_cloud_logs_payload(cloud_payload)
-                if recovered:
-                    self.owner.logger.warning(
-                        "Se detecta payload legacy/corrupto en get_access_logs; persistiendo reparacion."
-                    )
-                    self._persist_logs_data(logs_data)
-
-            logs_data = self._normalize_logs_data(logs_data)
-            logs = logs_data["logs"]
+            logs = self._load_current_logs_data()["logs"]
             self.owner.logger.operation_end("get_access_logs", success=True)
-            return logs[-limit:] if len(logs) > limit else logs
+            if limit <= 0:
+                return list(logs)
+            return list(islice(logs, max(len(logs) - limit, 0), None))
         except Exception as error:
             if not self.owner.current_user and isinstance(error, ConnectionError):
                 self.owner.logger.warning(f"Access logs unavailable until next login: {error}")
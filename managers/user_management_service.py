@@ -1,4 +1,3 @@
-import re
 from datetime import datetime
 
 from core.exceptions import (
@@ -7,6 +6,7 @@ from core.exceptions import (
     ConfigurationError,
     ValidationError,
     validate_min_length,
+    validate_username,
 )
 
 
@@ -34,11 +34,7 @@ class UserManagementService:
             raise AuthenticationError("Solo super_admin puede crear usuarios.")
 
         validate_min_length(username, 3, "username")
-        if not re.match(r"^[a-zA-Z0-9_-]+$", username):
-            raise ValidationError(
-                "Nombre de usuario invalido (solo letras, numeros, guiones y guiones bajos).",
-                details={"username": username},
-            )
+        validate_username(username)
 
         is_valid, message, score = self.owner.password_validator.validate_password_strength(
             password,
@@ -52,10 +48,11 @@ class UserManagementService:
 
         users_data = self.owner._load_users()
         try:
+            now_iso = datetime.now().isoformat()
             if not users_data:
                 users_data = {
                     "users": {},
-                    "created_at": datetime.now().isoformat(),
+                    "created_at": now_iso,
                     "version": "2.1",
                 }
 
@@ -69,10 +66,10 @@ class UserManagementService:
                 "password_history": [],
                 "role": role,
                 "tenant_id": kwargs.get("tenant_id"),
-                "created_at": datetime.now().isoformat(),
+                "created_at": now_iso,
                 "created_by": created_by or self.owner.current_user.get("username"),
                 "last_login": None,
-                "last_password_change": datetime.now().isoformat(),
+                "last_password_change": now_iso,
                 "active": True,
                 "permissions": self.owner._permissions_for_role(role),
                 "email": kwargs.get("email"),
@@ -81,12 +81,18 @@ class PasswordValidator:
         if not password_history:
             return True
         
-        # Verificar contra cada hash en el historial
+        # Cada hash bcrypt lleva su propio salt, asi que no hay atajo a checkpw;
+        # solo se evita verificar dos veces el mismo hash.
+        new_password_bytes = new_password.encode('utf-8')
+        checked_hashes = set()
         for old_hash in password_history:
+            if not isinstance(old_hash, str) or old_hash in checked_hashes:
+                continue
+            checked_hashes.add(old_hash)
             try:
-                if bcrypt.checkpw(new_password.encode('utf-8'), old_hash.encode('utf-8')):
+                if bcrypt.checkpw(new_password_bytes, old_hash.encode('utf-8')):
                     return False
-            except (ValueError, TypeError, AttributeError, UnicodeError):
+            except (ValueError, TypeError, UnicodeError):
                 continue
         
         return True
@@ -103,6 +109,7 @@ class AccountLockoutManager:
     MAX_FAILED_ATTEMPTS = 5
     LOCKOUT_DURATION_MINUTES = 15
     LOCKOUT_INCREASE_FACTOR = 2  # Cada bloqueo subsecuente dura el doble
+    MAX_TRACKED_IPS = 64  # Tope de IPs distintas registradas por cuenta
     
     def __init__(self):
         self.failed_attempts = {}  # username -> {count, last_attempt, lockout_until, lockout_count}
@@ -126,7 +133,7 @@ class AccountLockoutManager:
                 'last_attempt': now,
                 'lockout_until': None,
                 'lockout_count': 0,
-                'ip_addresses': []
+                'ip_addresses': set()
             }
         
         account_info = self.failed_attempts[username]
@@ -139,8 +146,11 @@ class AccountLockoutManager:
         account_info['count'] += 1
         account_info['last_attempt'] = now
         
-        if ip_address and ip_address not in account_info['ip_addresses']:
-            account_info['ip_addresses'].append(ip_address)
+        if ip_address:
+            tracked_ips = account_info['ip_addresses']
+            if ip_address not in tracked_ips and len(tracked_ips) >= self.MAX_TRACKED_IPS:
+                tracked_ips.pop()
+            tracked_ips.add(ip_address)
         
         # Si alcanza el máximo, bloquear cuenta
         if account_info['count'] >= self.MAX_FAILED_ATTEMPTS:
@@ -159,7 +169,7 @@ class AccountLockoutManager:
                 details={
                     'lockout_duration_minutes': duration_minutes,
                     'lockout_number': account_info['lockout_count'],
-                    'ip_addresses': account_info['ip_addresses']
+                    'ip_addresses': sorted(account_info['ip_addresses'])
                 },
                 severity='WARNING'
             )
@@ -175,7 +185,7 @@ class AccountLockoutManager:
         """
         if username in self.failed_attempts:
             self.failed_attempts[username]['count'] = 0
-            self.failed_attempts[username]['ip_addresses'] = []
+            self.failed_attempts[username]['ip_addresses'] = set()
             # Mantener lockout_until y lockout_count por si acaso
     
     def is_locked_out(self, username):
@@ -296,6 +306,8 @@ class UserManagerV2:
         self.current_web_token_type = "Bearer"
         self._users_cache_data = None
         self._users_cache_loaded_at = 0.0
+        self._users_cache_version = None
+        self._system_info_cache = None
         self.auth_provider = UserAuthProvider(self)
         self.auth_mode = self._resolve_auth_mode(auth_mode)
         self.user_repository = UserRepository(self)
@@ -386,8 +398,8 @@ class UserManagerV2:
     def _invalidate_users_cache(self):
         return self.user_repository._invalidate_users_cache()
 
-    def _set_users_cache(self, users_data):
-        return self.user_repository._set_users_cache(users_data)
+    def _set_users_cache(self, users_data, version=None):
+        return self.user_repository._set_users_cache(users_data, version)
 
     def _get_cached_users(self):
         return self.user_repository._get_cached_users()
@@ -442,15 +454,16 @@ class UserManagerV2:
                 )
             
             # Crear primer usuario
+            now_iso = datetime.now().isoformat()
             first_user = {
                 "username": first_user_username,
                 "password_hash": self._hash_password(first_user_password),
                 "password_history": [],
                 "role": "super_admin",
-                "created_at": datetime.now().isoformat(),
+                "created_at": now_iso,
                 "created_by": "system",
                 "last_login": None,
-                "last_password_change": datetime.now().isoformat(),
+                "last_password_change": now_iso,
                 "active": True,
                 "permissions": ["all"],
                 "email": None,
@@ -462,7 +475,7 @@ class UserManagerV2:
                 "users": {
                     first_user_username: first_user
                 },
-                "created_at": datetime.now().isoformat(),
+                "created_at": now_iso,
                 "version": "2.1",  # Incrementada por mejoras de seguridad
                 "migrated_from_legacy": False,
                 "password_policy": {
@@ -523,19 +536,24 @@ class UserManagerV2:
                                      password.encode('utf-8'),
                                      salt.encode('utf-8'),
                                      100000)
-            return key.hex() == stored_key
+            return secrets.compare_digest(key.hex(), stored_key)
         except (ValueError, TypeError, AttributeError, UnicodeError):
             return False
     
     def _get_system_info(self):
-        """Obtener información del sistema para auditoría"""
+        """Obtener información del sistema para auditoría (se resuelve una vez por sesión)"""
+        if self._system_info_cache is not None:
+            return dict(self._system_info_cache)
+
         try:
-            return {
-                'computer_name': socket.gethostname(),
+            hostname = socket.gethostname()
+            self._system_info_cache = {
+                'computer_name': hostname,
                 'username': Path.home().name,
                 'platform': platform.system(),
-                'ip': socket.gethostbyname(socket.gethostname())
+                'ip': socket.gethostbyname(hostname)
             }
+            return dict(self._system_info_cache)
         except (OSError, UnicodeError):
             return {
                 'computer_name': 'Unknown',
@@ -574,6 +592,14 @@ class UserManagerV2:
         """Guardar usuarios en almacenamiento"""
         return self.user_repository._save_users(users_data)
 
+    def _record_last_login(self, username, last_login):
+        """Registrar last_login pendiente de persistir en el proximo flush."""
+        return self.user_repository._record_last_login(username, last_login)
+
+    def flush_pending_users(self):
+        """Persistir cambios de usuarios diferidos (last_login)."""
+        return self.user_repository.flush_pending_users()
+
     def _normalize_logs_data(self, logs_data):
         """
         Asegurar formato v??lido para logs de auditor??a.
@@ -607,6 +633,14 @@ class UserManagerV2:
         """Agregar log con reintentos para reducir p??rdidas por escritura concurrente."""
         return self.audit_service._append_legacy_log_entry(log_entry)
 
+    def _append_legacy_log_entries(self, log_entries):
+        """Agregar un lote de logs con la misma estrategia de reintentos."""
+        return self.audit_service._append_legacy_log_entries(log_entries)
+
+    def flush_pending_logs(self):
+        """Persistir logs de auditoría legacy que siguen en el buffer en memoria."""
+        return self.audit_service.flush_pending_logs()
+
     @returns_result_tuple("repair_access_logs")
     def repair_access_logs(self):
         """Reparar archivo de logs de auditor??a (solo aplica a modo legacy)."""
@@ -753,10 +787,9 @@ class UserManagerV2:
         # En login exitoso, resetear contador de intentos
         self.lockout_manager.record_successful_login(username)
         
-        # Actualizar último login
+        # Actualizar último login (se persiste en diferido junto con otros logins)
         user["last_login"] = datetime.now().isoformat()
-        users_data["users"][username] = user
-        self._save_users(users_data)
+        self._record_last_login(username, user["last_login"])
         
         self.current_user = user
         self.logger.security_event("login_success", username, True, {'role': user.get('role')})
@@ -804,27 +837,8 @@ class UserManagerV2:
             self.logger.warning("Attempt to get users without authentication")
             raise AuthenticationError("No autenticado.")
         
-        users_data = self._load_users()
-        if not users_data or not isinstance(users_data.get("users"), dict):
-            self.logger.operation_end("get_users", success=True, count=0)
-            return []
-        users_list = []
-        
-        for username, user in users_data["users"].items():
-            users_list.append({
-                "username": username,
-                "role": user.get("role", "admin"),
-                "source": "local",
-                "tenant_id": user.get("tenant_id"),
-                "created_at": user.get("created_at"),
-                "last_login": user.get("last_login"),
-                "active": user.get("active", True),
-                "created_by": user.get("created_by"),
-                "email": user.get("email"),
-                "full_name": user.get("full_name"),
-                "password_strength": user.get("password_strength_score", 0)
-            })
-        self.logger.operation_end("get_users", success=True)
+        users_list = self.user_repository._get_users_list()
+        self.logger.operation_end("get_users", success=True, count=len(users_list))
         return users_list
     
     @returns_result_tuple("deactivate_user")
@@ -868,6 +882,8 @@ class UserManagerV2:
         if self.current_user:
             self._log_access("logout", self.current_user.get("username"), True)
             self.current_user = None
+        self.flush_pending_logs()
+        self.flush_pending_users()
         self.current_web_token = None
         self.current_web_token_type = "Bearer"
     
@@ -889,8 +905,7 @@ class UserManagerV2:
         """Verificar si existen usuarios"""
         if self._should_try_web_auth():
             return True
-        users_data = self._load_users()
-        return users_data and len(users_data.get('users', {})) > 0
+        return len(self.user_repository._get_users_list()) > 0
     
     def needs_initialization(self):
         """Verificar si el sistema necesita inicialización"""
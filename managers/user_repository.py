@@ -1,41 +1,213 @@
+import atexit
 import copy
-import json
+import hashlib
+import os
 import sys
+import threading
+import weakref
 from datetime import datetime
 from pathlib import Path
 
+from core import json_codec
 from core.exceptions import CloudStorageError, SecurityError, handle_errors
 
 
+# Repositorios con last_login pendientes: un solo hook de salida los persiste sin retenerlos vivos.
+_LIVE_USER_REPOSITORIES = weakref.WeakSet()
+
+
+def _flush_live_user_repositories():
+    for repository in list(_LIVE_USER_REPOSITORIES):
+        try:
+            repository.flush_pending_users()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_live_user_repositories)
+
+
 class UserRepository:
     """Persistencia/cache de usuarios para UserManagerV2."""
 
+    USERS_FLUSH_INTERVAL_SECONDS = 5.0
+
     def __init__(self, owner):
         self.owner = owner
+        self._pending_last_logins = {}
+        self._pending_users_lock = threading.Lock()
+        self._users_write_lock = threading.RLock()
+        self._users_flush_timer = None
+        self._users_cache_generation = 0
+        self._users_list_cache = None
+        self._users_list_generation = None
 
     def _invalidate_users_cache(self):
+        self._users_cache_generation += 1
         self.owner._users_cache_data = None
         self.owner._users_cache_loaded_at = 0.0
+        self.owner._users_cache_version = None
 
-    def _set_users_cache(self, users_data):
-        self.owner._users_cache_data = copy.deepcopy(self._normalize_users_data(users_data))
+    def _set_users_cache(self, users_data, version=None):
+        users_data = self._normalize_users_data(users_data)
+        self._apply_pending_last_logins(users_data)
+        self.owner._users_cache_data = copy.deepcopy(users_data)
+        self._users_cache_generation += 1
         self.owner._users_cache_loaded_at = self.owner._cache_clock()
+        self.owner._users_cache_version = version
+
+    def _apply_pending_last_logins(self, users_data):
+        """Reflejar en users_data los last_login que aun no se persistieron."""
+        with self._pending_users_lock:
+            pending = dict(self._pending_last_logins)
+
+        users = users_data.get("users") if isinstance(users_data, dict) else None
+        if not pending or not isinstance(users, dict):
+            return pending
+
+        for username, last_login in pending.items():
+            user = users.get(username)
+            if isinstance(user, dict):
+                user["last_login"] = last_login
+        return pending
+
+    def _record_last_login(self, username, last_login):
+        """Diferir la escritura de last_login para no subir users.json en cada login."""
+        with self._pending_users_lock:
+            self._pending_last_logins[username] = last_login
+            self._schedule_users_flush()
+
+        cached_users = (self.owner._users_cache_data or {}).get("users")
+        if isinstance(cached_users, dict) and isinstance(cached_users.get(username), dict):
+            cached_users[username]["last_login"] = last_login
+            self._users_cache_generation += 1
+
+    def _schedule_users_flush(self):
+        # Llamar con _pending_users_lock tomado.
+        if self._users_flush_timer is not None:
+            return
+
+        _LIVE_USER_REPOSITORIES.add(self)
+
+        timer = threading.Timer(self.USERS_FLUSH_INTERVAL_SECONDS, self.flush_pending_users)
+        timer.daemon = True
+        self._users_flush_timer = timer
+        timer.start()
+
+    def _forget_persisted_last_logins(self, persisted):
+        with self._pending_users_lock:
+            for username, last_login in persisted.items():
+                if self._pending_last_logins.get(username) == last_login:
+                    del self._pending_last_logins[username]
+
+    def flush_pending_users(self):
+        """Persistir en un solo guardado los last_login acumulados."""
+        with self._pending_users_lock:
+            if self._users_flush_timer is not None:
+                self._users_flush_timer.cancel()
+                self._users_flush_timer = None
+            if not self._pending_last_logins:
+                return True
 
-    def _get_cached_users(self):
-        if self.owner.local_mode or self.owner._users_cache_data is None:
+        try:
+            with self._users_write_lock:
+                users_data = self.owner._load_users()
+                if not users_data or not users_data.get("users"):
+                    return False
+                # _save_users aplica los pendientes y los descarta tras escribir.
+                self.owner._save_users(users_data)
+        except Exception as error:
+            self.owner.logger.warning(f"Fallo guardado diferido de usuarios: {error}")
+            return False
+        return True
+
+    def _content_version(self, content):
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.md5(content).hexdigest()
+
+    def _users_storage_version(self):
+        """Version actual de la base de usuarios (mtime local o ETag de R2)."""
+        try:
+            if self.owner.local_mode:
+                stat = os.stat(self.owner.users_file)
+                return (stat.st_mtime_ns, stat.st_size)
+
+            etag_getter = getattr(self.owner.cloud_manager, "get_file_etag", None)
+            if not callable(etag_getter):
+                return None
+            return etag_getter(self.owner.users_file)
+        except Exception:
             return None
 
+    def _users_cache_is_current(self):
+        if self.owner._users_cache_data is None:
+            return False
+
         age = self.owner._cache_clock() - self.owner._users_cache_loaded_at
-        if age > self.owner.USERS_CACHE_TTL_SECONDS:
-            self._invalidate_users_cache()
-            return None
+        if self.owner.local_mode or age > self.owner.USERS_CACHE_TTL_SECONDS:
+            # Fuera del TTL (o en modo local) solo se reutiliza si el almacenamiento no cambio.
+            version = self._users_storage_version()
+            if version is None or version != self.owner._users_cache_version:
+                self._invalidate_users_cache()
+                return False
+            self.owner._users_cache_loaded_at = self.owner._cache_clock()
+
+        return True
 
+    def _get_cached_users(self):
+        if not self._users_cache_is_current():
+            return None
         return copy.deepcopy(self.owner._users_cache_data)
 
+    def _build_users_list(self, users_data):
+        return [
+            {
+                "username": username,
+                "role": user.get("role", "admin"),
+                "source": "local",
+                "tenant_id": user.get("tenant_id"),
+                "created_at": user.get("created_at"),
+                "last_login": user.get("last_login"),
+                "active": user.get("active", True),
+                "created_by": user.get("created_by"),
+                "email": user.get("email"),
+                "full_name": user.get("full_name"),
+                "password_strength": user.get("password_strength_score", 0),
+            }
+            for username, user in users_data["users"].items()
+        ]
+
+    def _get_users_list(self):
+        """Listado resumido de usuarios, reconstruido solo cuando cambia la cache."""
+        if (
+            self._users_list_cache is not None
+            and self._users_cache_is_current()
+            and self._users_list_generation == self._users_cache_generation
+        ):
+            return [dict(entry) for entry in self._users_list_cache]
+
+        users_data = self.owner._load_users()
+        if not users_data or not isinstance(users_data.get("users"), dict):
+            return []
+
+        users_list = self._build_users_list(users_data)
+        if self.owner._users_cache_data is not None:
+            self._users_list_cache = users_list
+            self._users_list_generation = self._users_cache_generation
+        return [dict(entry) for entry in users_list]
+
     def _normalize_users_data(self, users_data):
         if not isinstance(users_data, dict):
             return {"users": {}, "created_at": datetime.now().isoformat(), "version": "2.1"}
 
+        if (
+            isinstance(users_data.get("users"), dict)
+            and "created_at" in users_data
+            and "version" in users_data
+        ):
+            return users_data
+
         normalized = dict(users_data)
         users = normalized.get("users")
 
@@ -82,8 +254,8 @@ class UserRepository:
             try:
                 if not path.exists():
                     continue
-                with open(path, "r", encoding="utf-8-sig") as file:
-                    data = json.load(file)
+                with open(path, "rb") as file:
+                    data = json_codec.loads(file.read())
                 normalized = self._normalize_users_data(data)
                 if normalized.get("users"):
                     self.owner.logger.warning(f"Copia local de usuarios encontrada en: {path}")
@@ -141,10 +313,12 @@ class UserRepository:
                     self.owner.logger.operation_end("_load_users", success=True)
                     return None
 
-                with open(self.owner.users_file, "r", encoding="utf-8-sig") as file:
-                    data = json.load(file)
+                loaded_version = self._users_storage_version()
+                with open(self.owner.users_file, "rb") as file:
+                    data = json_codec.loads(file.read())
 
                 data = self._normalize_users_data(data)
+                self._set_users_cache(data, loaded_version)
                 self.owner.logger.operation_end("_load_users", success=True)
                 return data
 
@@ -165,11 +339,8 @@ class UserRepository:
                 self.owner.logger.operation_end("_load_users", success=True)
                 return None
 
-            if isinstance(content, bytes):
-                content = content.decode("utf-8-sig")
-            elif isinstance(content, str):
-                content = content.lstrip("\ufeff")
-            cloud_payload = json.loads(content)
+            cloud_payload = json_codec.loads(content)
+            loaded_version = self._content_version(content)
             try:
                 data = self._decode_cloud_users_payload(cloud_payload)
             except SecurityError as integrity_error:
@@ -194,9 +365,10 @@ class UserRepository:
                             f"No se pudo subir copia local de usuarios a la nube: {sync_error}"
                         )
                     data = fallback_users
+                    loaded_version = None
 
             if data is not None:
-                self._set_users_cache(data)
+                self._set_users_cache(data, loaded_version)
 
             self.owner.logger.operation_end("_load_users", success=True)
             return data
@@ -211,20 +383,24 @@ class UserRepository:
     @handle_errors("_save_users", reraise=True)
     def _save_users(self, users_data):
         self.owner.logger.operation_start("_save_users")
+        self._users_write_lock.acquire()
         try:
             normalized_data = self._normalize_users_data(users_data)
+            persisted_last_logins = self._apply_pending_last_logins(normalized_data)
             if self.owner.local_mode:
-                with open(self.owner.users_file, "w") as file:
-                    json.dump(normalized_data, file, indent=2)
+                with open(self.owner.users_file, "wb") as file:
+                    file.write(json_codec.dumps(normalized_data, indent=True))
+                self._set_users_cache(normalized_data, self._users_storage_version())
             else:
                 if self.owner.cloud_encryption:
                     encrypted_data = self.owner.cloud_encryption.encrypt_cloud_data(normalized_data)
-                    content = json.dumps(encrypted_data, indent=2)
+                    content = json_codec.dumps_str(encrypted_data)
                 else:
-                    content = json.dumps(normalized_data, indent=2)
+                    content = json_codec.dumps_str(normalized_data)
 
                 self.owner.cloud_manager.upload_file_content(self.owner.users_file, content)
-                self._set_users_cache(normalized_data)
+                self._set_users_cache(normalized_data, self._content_version(content))
+            self._forget_persisted_last_logins(persisted_last_logins)
             self.owner.logger.operation_end("_save_users", success=True)
         except Exception as error:
             self.owner.logger.error(f"Error saving users: {error}", exc_info=True)
@@ -233,3 +409,5 @@ class UserRepository:
                 f"Error saving users: {str(error)}",
                 original_error=error,
             )
+        finally:
+            self._users_write_lock.release()
@@ -1,5 +1,3 @@
-import re
-
 import requests
 
 from core.exceptions import (
@@ -7,6 +5,7 @@ from core.exceptions import (
     ConfigurationError,
     ValidationError,
     validate_min_length,
+    validate_username,
 )
 
 
@@ -36,11 +35,7 @@ class UserTenantWebService:
             raise AuthenticationError("Solo super_admin puede crear usuarios por tenant.")
 
         validate_min_length(username, 3, "username")
-        if not re.match(r"^[a-zA-Z0-9_-]+$", username):
-            raise ValidationError(
-                "Nombre de usuario invalido (solo letras, numeros, guiones y guiones bajos).",
-                details={"username": username},
-            )
+        validate_username(username)
 
         tenant_id = str(tenant_id or "").strip()
 
@@ -3,17 +3,87 @@ Módulo de Generación de Reportes
 Crea reportes en Excel con gráficos y estadísticas
 """
 
+import io
+import re
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.chart import BarChart, PieChart, Reference
-from openpyxl.utils import get_column_letter
+from types import SimpleNamespace
+
+
+# openpyxl (y sus modulos de estilos/graficos) se importa recien al generar un
+# reporte: la ventana principal crea ReportGenerator al iniciar aunque nunca se
+# exporte nada.
+_REPORT_STYLES = None
+
+
+def _new_workbook(write_only=False):
+    """Crear workbook importando openpyxl bajo demanda."""
+    import openpyxl
+
+    return openpyxl.Workbook(write_only=write_only)
+
+
+def _report_styles():
+    """
+    Estilos compartidos, creados una sola vez: openpyxl deduplica estilos por
+    valor, asi que crear uno nuevo por celda solo agrega trabajo de comparacion
+    en el stylesheet.
+    """
+    global _REPORT_STYLES
+    if _REPORT_STYLES is None:
+        from openpyxl.styles import Alignment, Font, PatternFill
+
+        _REPORT_STYLES = SimpleNamespace(
+            title_font=Font(bold=True, size=16),
+            section_font=Font(bold=True, size=12),
+            label_font=Font(bold=True),
+            value_font=Font(size=12),
+            total_font=Font(bold=True, size=14),
+            success_count_font=Font(color="008000"),
+            failed_count_font=Font(color="FF0000"),
+            success_status_font=Font(color="008000", bold=True),
+            failed_status_font=Font(color="FF0000", bold=True),
+            header_font=Font(bold=True, color="FFFFFF"),
+            header_fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+            success_fill=PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+            failed_fill=PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+            center_alignment=Alignment(horizontal='center'),
+        )
+    return _REPORT_STYLES
+
+
+# Caracteres que no van en el nombre de archivo del reporte de cliente
+# (\w ya cubre letras, dígitos y '_'; el espacio se conserva)
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w ]+')
+
+# Textos de estado indexados por `status == 'success'` (False -> 0, True -> 1)
+_DAILY_STATUS_TEXT = ('✗', '✓')
+_CLIENT_STATUS_TEXT = ('✗ Fallida', '✓ Exitosa')
+
+
+def _most_common(counts, limit):
+    """Pares (clave, cantidad) de mayor a menor, acotados a `limit`."""
+    if not counts:
+        return []
+    if not isinstance(counts, Counter):
+        counts = Counter(counts)
+    return counts.most_common(limit)
+
+
+def _format_report_datetime(iso_value):
+    """Formatear timestamp ISO como 'dd/mm/YYYY HH:MM' (sin pasar por strftime)."""
+    ts = datetime.fromisoformat(iso_value)
+    return f"{ts.day:02d}/{ts.month:02d}/{ts.year:04d} {ts.hour:02d}:{ts.minute:02d}"
 
 
 class ReportGenerator:
     """Generador de reportes en Excel"""
     
+    # Filas máximas para rankings: evita tablas/gráficos enormes con marcas de cola larga
+    TOP_DRIVERS_LIMIT = 10
+    CHART_BRANDS_LIMIT = 20
+    
     def __init__(self, history_manager):
         """
         Inicializar generador de reportes
@@ -57,13 +127,11 @@ class ReportGenerator:
         if output_path is None:
             output_path = Path.home() / "Downloads" / f"Reporte_{month_name}_{year}.xlsx"
         
-        # Obtener datos
-        installations = self.history.get_installations(start_date=start_date, end_date=end_date)
+        # Obtener datos (las instalaciones se recorren página a página al escribir
+        # las hojas de detalle, sin cargar el mes completo en una lista)
+        installations = self.history.iter_installations(start_date=start_date, end_date=end_date)
         stats = self.history.get_statistics(start_date=start_date, end_date=end_date)
         
-        if installations is None:
-            installations = []
-            
         if stats is None:
             stats = {
                 'total_installations': 0,
@@ -76,24 +144,21 @@ class ReportGenerator:
                 'by_brand': {}
             }
         
-        # Crear workbook
+        # Crear workbook (write_only: las filas se serializan a medida que se agregan)
         self._reset_assignment_name_cache()
-        wb = openpyxl.Workbook()
+        wb = _new_workbook(write_only=True)
         
         # Hoja 1: Resumen
         self._create_summary_sheet(wb, installations, stats, f"{month_name} {year}")
         
-        # Hoja 2: Detalle de Instalaciones
-        self._create_installations_sheet(wb, installations)
-        
-        # Hoja 3: Por Cliente
-        self._create_clients_sheet(wb, installations)
+        # Hojas 2 y 3: Detalle de Instalaciones y Por Cliente (una sola pasada)
+        self._create_detail_sheets(wb, installations)
         
         # Hoja 4: Gráficos
         self._create_charts_sheet(wb, stats)
         
         # Guardar
-        wb.save(output_path)
+        self._save_workbook(wb, output_path)
         
         return str(output_path)
 
@@ -114,12 +179,9 @@ class ReportGenerator:
         if output_path is None:
             output_path = Path.home() / "Downloads" / f"Reporte_Anual_{year}.xlsx"
 
-        installations = self.history.get_installations(start_date=start_date, end_date=end_date)
+        installations = self.history.iter_installations(start_date=start_date, end_date=end_date)
         stats = self.history.get_statistics(start_date=start_date, end_date=end_date)
 
-        if installations is None:
-            installations = []
-
         if stats is None:
             stats = {
                 'total_installations': 0,
@@ -133,13 +195,12 @@ class ReportGenerator:
             }
 
         self._reset_assignment_name_cache()
-        wb = openpyxl.Workbook()
+        wb = _new_workbook(write_only=True)
         self._create_summary_sheet(wb, installations, stats, f"Anual {year}")
-        self._create_installations_sheet(wb, installations)
-        self._create_clients_sheet(wb, installations)
+        self._create_detail_sheets(wb, installations)
         self._create_charts_sheet(wb, stats)
 
-        wb.save(output_path)
+        self._save_workbook(wb, output_path)
         return str(output_path)
     
     def generate_daily_report(self, date=None, output_path=None):
@@ -181,76 +242,64 @@ class ReportGenerator:
                 'by_brand': {}
             }
         
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Reporte Diario"
-        
-        # Título
-        title = f"Reporte Diario - {date.strftime('%d/%m/%Y')}"
-        self._add_title(ws, title)
+        styles = _report_styles()
+        wb = _new_workbook(write_only=True)
+        ws = wb.create_sheet("Reporte Diario")
         
-        # Resumen rápido
-        row = 3
-        ws[f'A{row}'] = "Total Instalaciones:"
-        ws[f'B{row}'] = stats['total_installations']
-        ws[f'B{row}'].font = Font(bold=True, size=14)
+        # Anchos (en write_only deben fijarse antes de la primera fila)
+        for column, width in zip('ABCDEFG', (10, 25, 15, 12, 10, 12, 40)):
+            ws.column_dimensions[column].width = width
         
-        row += 1
-        ws[f'A{row}'] = "Exitosas:"
-        ws[f'B{row}'] = stats['successful_installations']
-        ws[f'B{row}'].font = Font(color="008000")
-        
-        row += 1
-        ws[f'A{row}'] = "Fallidas:"
-        ws[f'B{row}'] = stats['failed_installations']
-        ws[f'B{row}'].font = Font(color="FF0000")
-        
-        row += 2
+        # Título
+        self._append_title_row(ws, f"Reporte Diario - {date.strftime('%d/%m/%Y')}")
+        ws.append([])
+        
+        # Resumen rápido (filas 3 a 5)
+        ws.append([
+            "Total Instalaciones:",
+            self._styled_cell(ws, stats['total_installations'], font=styles.total_font),
+        ])
+        ws.append([
+            "Exitosas:",
+            self._styled_cell(ws, stats['successful_installations'], font=styles.success_count_font),
+        ])
+        ws.append([
+            "Fallidas:",
+            self._styled_cell(ws, stats['failed_installations'], font=styles.failed_count_font),
+        ])
+        ws.append([])
         
         # Detalle de instalaciones
         if installations:
             headers = ['Hora', 'Cliente', 'Marca', 'Versión', 'Estado', 'Tiempo (min)', 'Notas']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-            
-            row += 1
+            ws.append([
+                self._styled_cell(ws, header, font=styles.header_font, fill=styles.header_fill)
+                for header in headers
+            ])
             
+            # Celdas de estado coloreadas, reutilizadas en todas las filas
+            status_cells = (
+                self._styled_cell(ws, _DAILY_STATUS_TEXT[False], font=styles.failed_status_font),
+                self._styled_cell(ws, _DAILY_STATUS_TEXT[True], font=styles.success_status_font),
+            )
             for inst in installations:
                 timestamp = datetime.fromisoformat(inst['timestamp'])
-                time_str = timestamp.strftime('%H:%M')
-                
-                time_minutes = inst['installation_time_seconds'] / 60 if inst['installation_time_seconds'] else 0
+                time_str = f"{timestamp.hour:02d}:{timestamp.minute:02d}"
                 
-                ws.cell(row, 1, time_str)
-                ws.cell(row, 2, inst.get('client_name') or 'N/A')
-                ws.cell(row, 3, inst['driver_brand'])
-                ws.cell(row, 4, inst['driver_version'])
-                ws.cell(row, 5, '✓' if inst['status'] == 'success' else '✗')
-                ws.cell(row, 6, round(time_minutes, 1))
-                ws.cell(row, 7, inst.get('notes') or '')
+                seconds = inst['installation_time_seconds']
+                time_minutes = seconds / 60 if seconds else 0
                 
-                # Colorear estado
-                status_cell = ws.cell(row, 5)
-                if inst['status'] == 'success':
-                    status_cell.font = Font(color="008000", bold=True)
-                else:
-                    status_cell.font = Font(color="FF0000", bold=True)
-                
-                row += 1
-        
-        # Ajustar anchos
-        ws.column_dimensions['A'].width = 10
-        ws.column_dimensions['B'].width = 25
-        ws.column_dimensions['C'].width = 15
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 10
-        ws.column_dimensions['F'].width = 12
-        ws.column_dimensions['G'].width = 40
-        
-        wb.save(output_path)
+                ws.append([
+                    time_str,
+                    inst.get('client_name') or 'N/A',
+                    inst['driver_brand'],
+                    inst['driver_version'],
+                    status_cells[inst['status'] == 'success'],
+                    round(time_minutes, 1),
+                    inst.get('notes') or '',
+                ])
+        
+        self._save_workbook(wb, output_path)
         return str(output_path)
     
     def generate_client_report(self, client_name, output_path=None):
@@ -265,7 +314,7 @@ class ReportGenerator:
             Ruta del archivo generado
         """
         if output_path is None:
-            safe_name = "".join(c for c in client_name if c.isalnum() or c in (' ', '_')).strip()
+            safe_name = _UNSAFE_FILENAME_CHARS_RE.sub('', client_name).strip()
             output_path = Path.home() / "Downloads" / f"Reporte_Cliente_{safe_name}.xlsx"
         
         history = self.history.get_client_history(client_name)
@@ -277,115 +326,92 @@ class ReportGenerator:
                 'notes': []
             }
         
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Historial Cliente"
+        styles = _report_styles()
+        wb = _new_workbook(write_only=True)
+        ws = wb.create_sheet("Historial Cliente")
+        
+        # Anchos (en write_only deben fijarse antes de la primera fila)
+        for column, width in zip('ABCDEF', (18, 15, 12, 15, 12, 50)):
+            ws.column_dimensions[column].width = width
         
         # Título
-        self._add_title(ws, f"Historial de {client_name}")
+        self._append_title_row(ws, f"Historial de {client_name}")
+        ws.append([])
         
-        # Información del cliente
-        row = 3
+        # Información del cliente (filas 3 a 6)
         if history['client']:
             client = history['client']
-            ws[f'A{row}'] = "Total Servicios:"
-            ws[f'B{row}'] = client.get('total_services', 0)
-            
-            row += 1
-            ws[f'A{row}'] = "Última Visita:"
+            ws.append(["Total Servicios:", client.get('total_services', 0)])
             if client.get('last_visit'):
-                last_visit = datetime.fromisoformat(client['last_visit'])
-                ws[f'B{row}'] = last_visit.strftime('%d/%m/%Y %H:%M')
-            
-            row += 1
-            ws[f'A{row}'] = "Contacto:"
-            ws[f'B{row}'] = client.get('contact') or 'N/A'
-            
-            row += 1
-            ws[f'A{row}'] = "Dirección:"
-            ws[f'B{row}'] = client.get('address') or 'N/A'
-        
-        row += 2
+                ws.append(["Última Visita:", _format_report_datetime(client['last_visit'])])
+            else:
+                ws.append(["Última Visita:"])
+            ws.append(["Contacto:", client.get('contact') or 'N/A'])
+            ws.append(["Dirección:", client.get('address') or 'N/A'])
+            ws.append([])
+        else:
+            ws.append([])
+            ws.append([])
         
         # Historial de instalaciones
-        ws[f'A{row}'] = "Historial de Instalaciones"
-        ws[f'A{row}'].font = Font(bold=True, size=12)
-        row += 1
+        ws.append([self._styled_cell(ws, "Historial de Instalaciones", font=styles.section_font)])
         
         if history['installations']:
             headers = ['Fecha', 'Marca', 'Versión', 'Estado', 'Tiempo', 'Notas']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-            
-            row += 1
+            ws.append([
+                self._styled_cell(ws, header, font=styles.header_font, fill=styles.header_fill)
+                for header in headers
+            ])
             
             for inst in history['installations']:
-                timestamp = datetime.fromisoformat(inst['timestamp'])
-                date_str = timestamp.strftime('%d/%m/%Y %H:%M')
+                date_str = _format_report_datetime(inst['timestamp'])
                 
                 time_str = ''
-                if inst['installation_time_seconds']:
-                    minutes = inst['installation_time_seconds'] / 60
+                seconds = inst['installation_time_seconds']
+                if seconds:
+                    minutes = seconds / 60
                     time_str = f"{minutes:.1f} min"
                 
-                ws.cell(row, 1, date_str)
-                ws.cell(row, 2, inst['driver_brand'])
-                ws.cell(row, 3, inst['driver_version'])
-                ws.cell(row, 4, '✓ Exitosa' if inst['status'] == 'success' else '✗ Fallida')
-                ws.cell(row, 5, time_str)
-                ws.cell(row, 6, inst.get('notes') or '')
-                
-                row += 1
-        
-        row += 2
+                ws.append([
+                    date_str,
+                    inst['driver_brand'],
+                    inst['driver_version'],
+                    _CLIENT_STATUS_TEXT[inst['status'] == 'success'],
+                    time_str,
+                    inst.get('notes') or '',
+                ])
         
         # Notas del cliente
         if history['notes']:
-            ws[f'A{row}'] = "Notas y Observaciones"
-            ws[f'A{row}'].font = Font(bold=True, size=12)
-            row += 1
+            ws.append([])
+            ws.append([])
+            ws.append([self._styled_cell(ws, "Notas y Observaciones", font=styles.section_font)])
             
             headers = ['Fecha', 'Categoría', 'Nota']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row, col, header)
-                cell.font = Font(bold=True)
-            
-            row += 1
+            ws.append([self._styled_cell(ws, header, font=styles.label_font) for header in headers])
             
             for note in history['notes']:
-                timestamp = datetime.fromisoformat(note['timestamp'])
-                date_str = timestamp.strftime('%d/%m/%Y %H:%M')
+                date_str = _format_report_datetime(note['timestamp'])
                 
-                ws.cell(row, 1, date_str)
-                ws.cell(row, 2, note.get('category') or 'General')
-                ws.cell(row, 3, note.get('note') or '')
-                
-                row += 1
-        
-        # Ajustar anchos
-        ws.column_dimensions['A'].width = 18
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 15
-        ws.column_dimensions['E'].width = 12
-        ws.column_dimensions['F'].width = 50
+                ws.append([date_str, note.get('category') or 'General', note.get('note') or ''])
         
-        wb.save(output_path)
+        self._save_workbook(wb, output_path)
         return str(output_path)
     
     def _create_summary_sheet(self, wb, installations, stats, period_name):
         """Crear hoja de resumen"""
-        ws = wb.active
-        ws.title = "Resumen"
+        styles = _report_styles()
+        ws = wb.create_sheet("Resumen")
+        
+        # Anchos (en write_only deben fijarse antes de la primera fila)
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['B'].width = 20
         
         # Título
-        self._add_title(ws, f"Reporte de Instalaciones - {period_name}")
+        self._append_title_row(ws, f"Reporte de Instalaciones - {period_name}")
+        ws.append([])
         
         # Estadísticas principales
-        row = 3
         data = [
             ('Total de Instalaciones', stats['total_installations']),
             ('Instalaciones Exitosas', stats['successful_installations']),
@@ -396,80 +422,100 @@ class ReportGenerator:
         ]
         
         for label, value in data:
-            ws[f'A{row}'] = label
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'B{row}'] = value
-            ws[f'B{row}'].font = Font(size=12)
-            row += 1
+            ws.append([
+                self._styled_cell(ws, label, font=styles.label_font),
+                self._styled_cell(ws, value, font=styles.value_font),
+            ])
         
-        row += 2
+        ws.append([])
+        ws.append([])
         
         # Top drivers
-        ws[f'A{row}'] = "Drivers Más Instalados"
-        ws[f'A{row}'].font = Font(bold=True, size=12)
-        row += 1
+        ws.append([self._styled_cell(ws, "Drivers Más Instalados", font=styles.section_font)])
+        self._append_header_row(ws, ['Driver', 'Cantidad'])
         
-        headers = ['Driver', 'Cantidad']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row, col, header)
-            self._style_header(cell)
-        
-        row += 1
-        
-        for driver, count in stats['top_drivers'].items():
-            ws.cell(row, 1, driver)
-            ws.cell(row, 2, count)
-            row += 1
-        
-        # Ajustar anchos
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 20
+        for driver, count in _most_common(stats['top_drivers'], self.TOP_DRIVERS_LIMIT):
+            ws.append([driver, count])
     
-    def _create_installations_sheet(self, wb, installations):
-        """Crear hoja de detalle de instalaciones"""
-        ws = wb.create_sheet("Instalaciones")
-        
-        # Encabezados
-        headers = ['Fecha/Hora', 'Cliente', 'PC', 'Marca', 'Versión', 
-                  'Estado', 'Tiempo (min)', 'Técnico', 'Notas']
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(1, col, header)
-            self._style_header(cell)
+    def _create_detail_sheets(self, wb, installations):
+        """
+        Crear las hojas de instalaciones y por cliente en una sola pasada.
+
+        Cada instalación se escribe en "Instalaciones" y se acumula para
+        "Por Cliente" en la misma iteración, así `installations` puede ser un
+        generador que se consume una sola vez.
+        """
+        ws_inst, status_cells = self._start_installations_sheet(wb)
+        ws_clients = self._start_clients_sheet(wb)
         
-        # Datos
-        row = 2
+        clients_data = {}
+        driver_names = {}
         for inst in installations:
-            timestamp = datetime.fromisoformat(inst['timestamp'])
-            date_str = timestamp.strftime('%d/%m/%Y %H:%M')
+            succeeded = inst['status'] == 'success'
             
-            time_minutes = inst['installation_time_seconds'] / 60 if inst['installation_time_seconds'] else 0
+            # Fila de detalle
+            seconds = inst['installation_time_seconds']
+            time_minutes = seconds / 60 if seconds else 0
+            ws_inst.append([
+                _format_report_datetime(inst['timestamp']),
+                inst.get('client_name') or 'N/A',
+                inst.get('client_pc_name') or 'N/A',
+                inst['driver_brand'],
+                inst['driver_version'],
+                status_cells[succeeded],
+                round(time_minutes, 1),
+                self._resolve_installation_technician_display_name(inst),
+                inst.get('notes') or '',
+            ])
             
-            technician_display_name = self._resolve_installation_technician_display_name(inst)
-
-            ws.cell(row, 1, date_str)
-            ws.cell(row, 2, inst.get('client_name') or 'N/A')
-            ws.cell(row, 3, inst.get('client_pc_name') or 'N/A')
-            ws.cell(row, 4, inst['driver_brand'])
-            ws.cell(row, 5, inst['driver_version'])
-            ws.cell(row, 6, 'Exitosa' if inst['status'] == 'success' else 'Fallida')
-            ws.cell(row, 7, round(time_minutes, 1))
-            ws.cell(row, 8, technician_display_name)
-            ws.cell(row, 9, inst.get('notes') or '')
+            # Agrupar por cliente
+            client = inst.get('client_name') or 'Sin nombre'
+            data = clients_data.get(client)
+            if data is None:
+                data = clients_data[client] = {
+                    'total': 0,
+                    'successful': 0,
+                    'failed': 0,
+                    'drivers': set()
+                }
             
-            # Colorear estado
-            status_cell = ws.cell(row, 6)
-            if inst['status'] == 'success':
-                status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-            else:
-                status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+            data['total'] += 1
+            data['successful' if succeeded else 'failed'] += 1
             
-            row += 1
+            # Un solo str por combinacion marca/version, compartido entre clientes
+            driver_key = (inst['driver_brand'], inst['driver_version'])
+            driver_name = driver_names.get(driver_key)
+            if driver_name is None:
+                driver_name = driver_names[driver_key] = f"{driver_key[0]} {driver_key[1]}"
+            data['drivers'].add(driver_name)
+        
+        self._append_client_rows(ws_clients, clients_data)
+    
+    def _start_installations_sheet(self, wb):
+        """Crear hoja de detalle de instalaciones con encabezados"""
+        from openpyxl.utils import get_column_letter
+
+        styles = _report_styles()
+        ws = wb.create_sheet("Instalaciones")
         
-        # Ajustar anchos
+        # Anchos (en write_only deben fijarse antes de la primera fila)
         widths = [18, 25, 20, 15, 12, 12, 12, 20, 40]
         for col, width in enumerate(widths, 1):
             ws.column_dimensions[get_column_letter(col)].width = width
+        
+        # Encabezados
+        headers = ['Fecha/Hora', 'Cliente', 'PC', 'Marca', 'Versión', 
+                  'Estado', 'Tiempo (min)', 'Técnico', 'Notas']
+        self._append_header_row(ws, headers)
+        
+        # Celdas de estado con estilo creadas una sola vez: en write_only cada fila se
+        # serializa al hacer append, asi que la misma celda se reutiliza en todas.
+        # Indexadas por `status == 'success'` (False -> 0, True -> 1).
+        status_cells = (
+            self._styled_cell(ws, 'Fallida', fill=styles.failed_fill),
+            self._styled_cell(ws, 'Exitosa', fill=styles.success_fill),
+        )
+        return ws, status_cells
 
     def _resolve_installation_technician_display_name(self, installation):
         """Resolver nombre técnico consistente priorizando asignaciones estructuradas."""
@@ -521,89 +567,66 @@ class ReportGenerator:
             return self._installation_assignment_name_cache[cache_key]
         return resolved_name or "N/A"
     
-    def _create_clients_sheet(self, wb, installations):
-        """Crear hoja de resumen por cliente"""
+    def _start_clients_sheet(self, wb):
+        """Crear hoja de resumen por cliente con encabezados"""
         ws = wb.create_sheet("Por Cliente")
         
-        # Agrupar por cliente
-        clients_data = {}
-        for inst in installations:
-            client = inst.get('client_name') or 'Sin nombre'
-            if client not in clients_data:
-                clients_data[client] = {
-                    'total': 0,
-                    'successful': 0,
-                    'failed': 0,
-                    'drivers': []
-                }
-            
-            clients_data[client]['total'] += 1
-            if inst['status'] == 'success':
-                clients_data[client]['successful'] += 1
-            else:
-                clients_data[client]['failed'] += 1
-            
-            driver_name = f"{inst['driver_brand']} {inst['driver_version']}"
-            clients_data[client]['drivers'].append(driver_name)
-        
-        # Encabezados
-        headers = ['Cliente', 'Total', 'Exitosas', 'Fallidas', 'Tasa Éxito', 'Drivers']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(1, col, header)
-            self._style_header(cell)
-        
-        # Datos
-        row = 2
-        for client, data in sorted(clients_data.items(), key=lambda x: x[1]['total'], reverse=True):
-            success_rate = (data['successful'] / data['total'] * 100) if data['total'] > 0 else 0
-            drivers_list = ', '.join(set(data['drivers']))
-            
-            ws.cell(row, 1, client)
-            ws.cell(row, 2, data['total'])
-            ws.cell(row, 3, data['successful'])
-            ws.cell(row, 4, data['failed'])
-            ws.cell(row, 5, f"{success_rate:.1f}%")
-            ws.cell(row, 6, drivers_list)
-            
-            row += 1
-        
-        # Ajustar anchos
+        # Anchos (en write_only deben fijarse antes de la primera fila)
         ws.column_dimensions['A'].width = 30
         ws.column_dimensions['B'].width = 10
         ws.column_dimensions['C'].width = 10
         ws.column_dimensions['D'].width = 10
         ws.column_dimensions['E'].width = 12
         ws.column_dimensions['F'].width = 50
+        
+        # Encabezados
+        headers = ['Cliente', 'Total', 'Exitosas', 'Fallidas', 'Tasa Éxito', 'Drivers']
+        self._append_header_row(ws, headers)
+        return ws
     
+    def _append_client_rows(self, ws, clients_data):
+        """Escribir el resumen acumulado por cliente, de mayor a menor total"""
+        for client, data in sorted(clients_data.items(), key=lambda x: x[1]['total'], reverse=True):
+            success_rate = (data['successful'] / data['total'] * 100) if data['total'] > 0 else 0
+            drivers_list = ', '.join(data['drivers'])
+            
+            ws.append([
+                client,
+                data['total'],
+                data['successful'],
+                data['failed'],
+                f"{success_rate:.1f}%",
+                drivers_list,
+            ])
+    
+
     def _create_charts_sheet(self, wb, stats):
         """Crear hoja con gráficos"""
+        from openpyxl.chart import BarChart, Reference
+
         ws = wb.create_sheet("Gráficos")
         
-        # Datos para gráfico de marcas
-        row = 2
-        ws.cell(row, 1, "Marca")
-        ws.cell(row, 2, "Cantidad")
-        self._style_header(ws.cell(row, 1))
-        self._style_header(ws.cell(row, 2))
+        # Datos para gráfico de marcas (encabezado en la fila 2)
+        header_row = 2
+        ws.append([])
+        self._append_header_row(ws, ["Marca", "Cantidad"])
         
-        row += 1
-        start_row = row
+        by_brand = _most_common(stats['by_brand'], self.CHART_BRANDS_LIMIT)
+        for brand, count in by_brand:
+            ws.append([brand, count])
         
-        for brand, count in stats['by_brand'].items():
-            ws.cell(row, 1, brand)
-            ws.cell(row, 2, count)
-            row += 1
-        
-        end_row = row - 1
+        # El rango del gráfico sale del tamaño de la tabla, sin releer la hoja
+        start_row = header_row + 1
+        end_row = header_row + len(by_brand)
         
         # Crear gráfico de barras
-        if end_row >= start_row:
+        if by_brand:
             chart = BarChart()
             chart.title = "Instalaciones por Marca"
             chart.x_axis.title = "Marca"
             chart.y_axis.title = "Cantidad"
             
-            data = Reference(ws, min_col=2, min_row=2, max_row=end_row)
+            data = Reference(ws, min_col=2, min_row=header_row, max_row=end_row)
             cats = Reference(ws, min_col=1, min_row=start_row, max_row=end_row)
             
             chart.add_data(data, titles_from_data=True)
@@ -611,15 +634,57 @@ class ReportGenerator:
             
             ws.add_chart(chart, "D2")
     
-    def _add_title(self, ws, title):
-        """Agregar título a la hoja"""
-        ws['A1'] = title
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:D1')
-        ws['A1'].alignment = Alignment(horizontal='center')
+    def _save_workbook(self, wb, output_path):
+        """
+        Serializar el workbook en memoria y escribirlo de una vez.
+
+        Crea la carpeta de destino si falta (p. ej. Downloads en perfiles
+        nuevos) y no deja un .xlsx a medio escribir si la serialización falla.
+        """
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(buffer.getbuffer())
     
     def _style_header(self, cell):
         """Aplicar estilo a encabezado"""
-        cell.font = Font(bold=True, color="FFFFFF")
-        cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        cell.alignment = Alignment(horizontal='center')
+        styles = _report_styles()
+        cell.font = styles.header_font
+        cell.fill = styles.header_fill
+        cell.alignment = styles.center_alignment
+
+    def _styled_cell(self, ws, value, font=None, fill=None, alignment=None):
+        """Crear celda con estilo para hojas write_only."""
+        from openpyxl.cell import WriteOnlyCell
+
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+
+    def _append_title_row(self, ws, title):
+        """Agregar título (fila 1) a una hoja write_only"""
+        styles = _report_styles()
+        ws.append([
+            self._styled_cell(
+                ws,
+                title,
+                font=styles.title_font,
+                alignment=styles.center_alignment,
+            )
+        ])
+        ws.merged_cells.add('A1:D1')
+
+    def _append_header_row(self, ws, headers):
+        """Agregar fila de encabezados con estilo a una hoja write_only"""
+        header_cells = []
+        for header in headers:
+            cell = self._styled_cell(ws, header)
+            self._style_header(cell)
+            header_cells.append(cell)
+        ws.append(header_cells)
@@ -127,7 +127,8 @@ def main() -> int:
     config_data["api_token"] = api_token
     config_data["api_secret"] = api_secret
 
-    ok = sm.encrypt_config_file(config_data, master_password, config_path)
+    # Reutiliza la clave derivada al descifrar: mismo password y mismo salt.
+    ok = sm.encrypt_config_file(config_data, file_path=config_path)
     if not ok:
         print("[ERROR] No se pudo volver a cifrar config.enc.")
         return 1
@@ -15,11 +15,20 @@ from __future__ import annotations
 
 import argparse
 import getpass
+import hashlib
 import os
 from pathlib import Path
 
 from core.security_manager import SecurityManager
 
+def read_salt_fingerprint(salt_dir: Path) -> str | None:
+    """SHA-256 of salt_dir/.security_salt, or None when the dir has no salt."""
+    try:
+        return hashlib.sha256((salt_dir / ".security_salt").read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
 def decrypt_with_salt_dir(
     config_path: Path, password: str, salt_dir: Path
 ) -> tuple[dict | None, SecurityManager]:
@@ -135,9 +144,21 @@ def main() -> int:
     security: SecurityManager | None = None
     used_salt_dir: Path | None = None
 
+    # Each attempt pays the full key derivation, so only try directories that
+    # actually hold a salt, and never the same salt twice.
+    tried_salts: set[str] = set()
+    explicit_salt_dir = bool(args.salt_dir)
+
     for salt_dir in unique_dirs:
         if not salt_dir.exists():
             continue
+        fingerprint = read_salt_fingerprint(salt_dir)
+        if fingerprint is None and not explicit_salt_dir:
+            continue
+        if fingerprint is not None:
+            if fingerprint in tried_salts:
+                continue
+            tried_salts.add(fingerprint)
         config_data, sec = decrypt_with_salt_dir(config_path, password, salt_dir)
         if config_data:
             current_config = config_data
@@ -166,7 +187,8 @@ def main() -> int:
         current_config.setdefault("history_api_url", api_base_url)
         current_config["api_url"] = api_base_url
 
-    saved = security.encrypt_config_file(current_config, password, config_path)
+    # Reuse the key derived while decrypting: same password, same salt.
+    saved = security.encrypt_config_file(current_config, file_path=config_path)
     if not saved:
         print("ERROR: failed to re-encrypt config.enc.")
         return 1
@@ -15,20 +15,46 @@ from __future__ import annotations
 
 import argparse
 import getpass
-import json
 import os
-import urllib.error
-import urllib.request
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
+import requests
+
+from core import json_codec
 from core.security_manager import CloudDataEncryption, SecurityManager
 from managers.cloud_manager import CloudflareR2Manager
 
+# Login e import van al mismo Worker: cada hilo reutiliza su propia sesion (y su
+# conexion TLS). requests.Session no es thread-safe y el import usa varios workers.
+_HTTP_SESSIONS = threading.local()
+
+
+def get_http_session() -> requests.Session:
+    session = getattr(_HTTP_SESSIONS, "session", None)
+    if session is None:
+        session = requests.Session()
+        _HTTP_SESSIONS.session = session
+    return session
+
+# El Worker rechaza lotes de mas de 1000 usuarios en /web/auth/import-users.
+MAX_IMPORT_BATCH_SIZE = 1000
+
+# D1 serializa las escrituras de una base: mas de 4 lotes simultaneos solo se encolan
+# en el Worker y acercan cada request a sus limites de CPU/tiempo.
+DEFAULT_IMPORT_CONCURRENCY = 4
+
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+
 def detect_hash_type(password_hash: str) -> str:
     value = (password_hash or "").strip()
     if value.startswith("pbkdf2_sha256$"):
         return "pbkdf2_sha256"
-    if value.startswith("$2a$") or value.startswith("$2b$") or value.startswith("$2y$"):
+    if value.startswith(_BCRYPT_PREFIXES):
         return "bcrypt"
     return "legacy_pbkdf2_hex"
 
@@ -58,6 +84,22 @@ def normalize_users_payload(payload: object) -> dict[str, dict]:
     return {}
 
 
+def build_import_items(users_map: dict[str, dict]) -> list[dict]:
+    # El for sobre una tupla de un elemento deja el hash ya limpio en `password_hash`.
+    return [
+        {
+            "username": username,
+            "password_hash": password_hash,
+            "password_hash_type": detect_hash_type(password_hash),
+            "role": str(user.get("role", "viewer")).strip() or "viewer",
+            "is_active": bool(user.get("active", True)),
+        }
+        for username, user in users_map.items()
+        for password_hash in (str(user.get("password_hash", "")).strip(),)
+        if username and password_hash
+    ]
+
+
 def request_json(method: str, url: str, payload: dict | None = None, headers: dict | None = None) -> dict:
     body = None
     request_headers = {
@@ -72,45 +114,111 @@ def request_json(method: str, url: str, payload: dict | None = None, headers: di
     if headers:
         request_headers.update(headers)
     if payload is not None:
-        body = json.dumps(payload).encode("utf-8")
+        body = json_codec.dumps(payload)
 
-    req = urllib.request.Request(url=url, data=body, method=method, headers=request_headers)
-    try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as error:
-        raw = error.read().decode("utf-8", errors="replace")
+    response = get_http_session().request(method, url, data=body, headers=request_headers, timeout=30)
+    if response.status_code >= 400:
+        raw = response.content.decode("utf-8", errors="replace")
         if "error code: 1010" in raw.lower():
             raise RuntimeError(
-                f"HTTP {error.code} {url}: Cloudflare bloqueó esta solicitud (1010). "
+                f"HTTP {response.status_code} {url}: Cloudflare bloqueó esta solicitud (1010). "
                 "Intenta usar --access-token para evitar el login desde script."
-            ) from error
-        raise RuntimeError(f"HTTP {error.code} {url}: {raw}") from error
+            )
+        raise RuntimeError(f"HTTP {response.status_code} {url}: {raw}")
+    return json_codec.loads(response.content)
+
+
+def import_users_in_batches(
+    api_base_url: str,
+    access_token: str,
+    import_items: list[dict],
+    batch_size: int = 500,
+    concurrency: int = DEFAULT_IMPORT_CONCURRENCY,
+) -> dict:
+    batch_size = max(1, min(batch_size, MAX_IMPORT_BATCH_SIZE))
+    batches = [import_items[i:i + batch_size] for i in range(0, len(import_items), batch_size)]
+    url = f"{api_base_url}/web/auth/import-users"
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    def post_batch(batch: list[dict]) -> dict:
+        return request_json("POST", url, {"users": batch}, headers=headers)
+
+    totals = {"created": 0, "updated": 0, "imported": 0, "batches": len(batches), "succeeded_batches": 0}
+    failed_batches = []
+    # Un lote fallido no descarta el resultado de los demas: se suman los exitosos y se
+    # reportan los fallidos. El import es un upsert por usuario, asi que volver a correr
+    # el script solo repite sin riesgo los usuarios que ya quedaron importados.
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as executor:
+        futures = {executor.submit(post_batch, batch): index for index, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                response = future.result()
+            except Exception as error:
+                batch = batches[index]
+                failed_batches.append({
+                    "index": index,
+                    "users": len(batch),
+                    "first_username": batch[0].get("username"),
+                    "last_username": batch[-1].get("username"),
+                    "error": str(error),
+                })
+                continue
+            totals["succeeded_batches"] += 1
+            for key in ("created", "updated", "imported"):
+                totals[key] += int(response.get(key, 0) or 0)
+
+    totals["failed_batches"] = sorted(failed_batches, key=lambda failure: failure["index"])
+    return totals
 
 
-def decrypt_with_salt_dir(config_path: Path, password: str, salt_dir: Path) -> tuple[dict | None, SecurityManager]:
-    security = SecurityManager()
+@contextmanager
+def salt_dir_override(security: SecurityManager, salt_dir: Path):
     security._get_config_dir = lambda: salt_dir  # type: ignore[method-assign]
-    config_data = security.decrypt_config_file(password, config_path)
+    try:
+        yield security
+    finally:
+        # Quitar el atributo de instancia vuelve a exponer el metodo de la clase.
+        del security._get_config_dir
+
+
+def decrypt_with_salt_dir(
+    config_path: Path,
+    password: str,
+    salt_dir: Path,
+    security: SecurityManager | None = None,
+) -> tuple[dict | None, SecurityManager]:
+    security = security or SecurityManager()
+    with salt_dir_override(security, salt_dir):
+        config_data = security.decrypt_config_file(password, config_path)
     return config_data, security
 
 
-def resolve_master_password(args: argparse.Namespace) -> str:
-    password = args.password or ""
-    if not password and args.password_env:
-        password = os.getenv(args.password_env, "")
-    if password:
-        return password
+def prompt_secret(label: str) -> str:
+    # Con stdin redirigido (CI, pipes) no hay terminal que ocultar: se lee una
+    # linea directa en vez de pasar por getpass (que avisa y relee) e input().
+    if sys.stdin is not None and not sys.stdin.isatty():
+        return sys.stdin.readline().strip()
 
     try:
-        password = getpass.getpass("Desktop master password (hidden): ").strip()
+        secret = getpass.getpass(f"{label} (hidden): ").strip()
     except Exception:
-        password = ""
+        secret = ""
+
+    if secret:
+        return secret
 
+    return input(f"{label} (visible): ").strip()
+
+
+def resolve_master_password(args: argparse.Namespace) -> str:
+    password = args.password or ""
+    if not password and args.password_env:
+        password = os.getenv(args.password_env, "")
     if password:
         return password
 
-    return input("Desktop master password (visible): ").strip()
+    return prompt_secret("Desktop master password")
 
 
 def load_users_from_r2(args: argparse.Namespace) -> dict[str, dict]:
@@ -131,11 +239,32 @@ def load_users_from_r2(args: argparse.Namespace) -> dict[str, dict]:
     config_data = None
     security: SecurityManager | None = None
     used_salt_dir: Path | None = None
+    # Cada intento paga el PBKDF2 completo (y otro mas si entra la recuperacion de salt):
+    # solo se prueban directorios con salt propio, sin repetir el mismo salt.
+    candidate_security = SecurityManager()
+    tried_salts: set[bytes] = set()
+    seen_dirs: set[str] = set()
     for directory in candidate_salt_dirs:
+        if not directory.exists():
+            continue
         resolved = directory.resolve()
-        if not resolved.exists():
+        resolved_key = os.fspath(resolved)
+        if resolved_key in seen_dirs:
+            continue
+        seen_dirs.add(resolved_key)
+        try:
+            salt = (resolved / ".security_salt").read_bytes()
+        except OSError:
+            salt = None
+        if salt is None and not args.salt_dir:
             continue
-        maybe_config, maybe_security = decrypt_with_salt_dir(config_path, password, resolved)
+        if salt is not None:
+            if salt in tried_salts:
+                continue
+            tried_salts.add(salt)
+        maybe_config, maybe_security = decrypt_with_salt_dir(
+            config_path, password, resolved, security=candidate_security
+        )
         if maybe_config:
             config_data = maybe_config
             security = maybe_security
@@ -160,28 +289,27 @@ def load_users_from_r2(args: argparse.Namespace) -> dict[str, dict]:
     )
 
     users_key = args.r2_users_key
-    raw_content = cloud.download_file_content(users_key)
+    # Bytes crudos: el codec los parsea sin pasar por un str intermedio.
+    raw_content = cloud.download_file_content(users_key, binary=True)
     if not raw_content:
         raise RuntimeError(f"R2 key not found or empty: {users_key}")
 
-    payload = json.loads(raw_content)
+    payload = json_codec.loads(raw_content)
+    if isinstance(payload, dict) and payload.get("_encrypted"):
+        # Sobre cifrado: `payload` no se vuelve a usar, asi que decrypt_cloud_data
+        # puede consumir sus marcas (_hmac/_encrypted) sin copiarlo antes.
+        payload = CloudDataEncryption(security).decrypt_cloud_data(payload)
     users = normalize_users_payload(payload)
     if users:
         return users
 
-    cloud_crypto = CloudDataEncryption(security)
-    decrypted_payload = cloud_crypto.decrypt_cloud_data(dict(payload))
-    users = normalize_users_payload(decrypted_payload)
-    if users:
-        return users
-
     raise RuntimeError("Could not parse users payload from R2 (plain or encrypted).")
 
 
 def load_users_from_file(users_file: Path) -> dict[str, dict]:
     if not users_file.exists():
         raise RuntimeError(f"users file not found: {users_file}")
-    payload = json.loads(users_file.read_text(encoding="utf-8-sig"))
+    payload = json_codec.loads(users_file.read_bytes())
     users = normalize_users_payload(payload)
     if not users:
         raise RuntimeError(f"No users found in: {users_file}")
@@ -227,6 +355,18 @@ def main() -> int:
         help="Environment variable for desktop master password",
     )
     parser.add_argument("--salt-dir", default="", help="Optional directory containing .security_salt")
+    parser.add_argument(
+        "--import-batch-size",
+        type=int,
+        default=500,
+        help=f"Users per /web/auth/import-users request (max {MAX_IMPORT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--import-concurrency",
+        type=int,
+        default=DEFAULT_IMPORT_CONCURRENCY,
+        help=f"Parallel import requests (default {DEFAULT_IMPORT_CONCURRENCY}; D1 serializes writes)",
+    )
     args = parser.parse_args()
 
     api_base_url = args.api_base_url.strip().rstrip("/")
@@ -249,12 +389,7 @@ def main() -> int:
         if not admin_password and args.admin_password_env:
             admin_password = os.getenv(args.admin_password_env, "").strip()
         if not admin_password:
-            try:
-                admin_password = getpass.getpass("Web admin password (hidden): ").strip()
-            except Exception:
-                admin_password = ""
-        if not admin_password:
-            admin_password = input("Web admin password (visible): ").strip()
+            admin_password = prompt_secret("Web admin password")
         if not admin_username or not admin_password:
             print("ERROR: admin username/password required when access token is not provided.")
             return 1
@@ -268,22 +403,8 @@ def main() -> int:
         print(f"ERROR loading users: {error}")
         return 1
 
-    import_items = []
-    skipped = 0
-    for username, user in users_map.items():
-        password_hash = str(user.get("password_hash", "")).strip()
-        if not username or not password_hash:
-            skipped += 1
-            continue
-        import_items.append(
-            {
-                "username": username,
-                "password_hash": password_hash,
-                "password_hash_type": detect_hash_type(password_hash),
-                "role": str(user.get("role", "viewer")).strip() or "viewer",
-                "is_active": bool(user.get("active", True)),
-            }
-        )
+    import_items = build_import_items(users_map)
+    skipped = len(users_map) - len(import_items)
 
     if not import_items:
         print("ERROR: no importable users found (missing username/password_hash).")
@@ -303,25 +424,34 @@ def main() -> int:
             if not access_token:
                 raise RuntimeError("Login did not return access_token.")
 
-        import_response = request_json(
-            "POST",
-            f"{api_base_url}/web/auth/import-users",
-            {
-                "users": import_items,
-            },
-            headers={"Authorization": f"Bearer {access_token}"},
+        import_response = import_users_in_batches(
+            api_base_url,
+            access_token,
+            import_items,
+            batch_size=args.import_batch_size,
+            concurrency=args.import_concurrency,
         )
     except Exception as error:
         print(f"ERROR syncing users: {error}")
         return 1
 
-    print("OK: user sync finished.")
+    failed_batches = import_response["failed_batches"]
+    print("ERROR: user sync finished with failed batches." if failed_batches else "OK: user sync finished.")
     print(f"Source users: {len(users_map)}")
     print(f"Imported payload users: {len(import_items)}")
     print(f"Skipped invalid users: {skipped}")
+    print(f"Import batches: {import_response['succeeded_batches']}/{import_response['batches']} succeeded")
     print(f"Created: {import_response.get('created', 0)}")
     print(f"Updated: {import_response.get('updated', 0)}")
     print(f"Imported: {import_response.get('imported', 0)}")
+    for failure in failed_batches:
+        print(
+            f"Failed batch #{failure['index']} ({failure['users']} users, "
+            f"{failure['first_username']}..{failure['last_username']}): {failure['error']}"
+        )
+    if failed_batches:
+        print("Re-run the script to retry: the import upserts users, so landed users are not duplicated.")
+        return 1
     return 0
 
 
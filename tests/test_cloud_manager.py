@@ -189,6 +189,24 @@ class TestCloudflareR2Manager(unittest.TestCase):
 
         self.assertIsNone(content)
 
+    def test_get_file_etag_strips_quotes_and_handles_missing_key(self):
+        manager = self._new_manager()
+        manager.s3_client.head_object.return_value = {"ETag": '"abc123"'}
+
+        self.assertEqual(manager.get_file_etag("system/access_logs.json"), "abc123")
+
+        manager.s3_client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404", "Message": "Not Found"}},
+            "HeadObject",
+        )
+        self.assertIsNone(manager.get_file_etag("missing.json"))
+
+    def test_download_file_content_returns_raw_bytes_when_binary(self):
+        manager = self._new_manager()
+        manager.s3_client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"\x82\xa4logs"))}
+
+        self.assertEqual(manager.download_file_content("system/access_logs.json", binary=True), b"\x82\xa4logs")
+
     def test_search_drivers_applies_filters(self):
         manager = self._new_manager()
         manager.list_drivers = MagicMock(
@@ -115,6 +115,25 @@ class TestConfigManager(unittest.TestCase):
         self.assertNotIn("sk-sensitive", encrypted_content)
         self.assertNotIn("bucket-sensitive", encrypted_content)
 
+    def test_save_after_load_reuses_derived_key(self):
+        manager = self._new_manager()
+        manager.config_dir = self.base_path / "config"
+        manager.encrypted_config_file = manager.config_dir / "config.enc"
+
+        with patch.dict(os.environ, {MASTER_PASSWORD_ENV: "test-master-pass"}, clear=False):
+            manager._set_master_password("test-master-pass")
+            with patch.object(manager.security, "_get_config_dir", return_value=manager.config_dir):
+                self.assertTrue(manager.save_config_data({"bucket_name": "b1"}))
+                with patch.object(manager.security, "_derive_key", wraps=manager.security._derive_key) as mock_derive:
+                    self.assertEqual(manager.load_config_data(), {"bucket_name": "b1"})
+                    self.assertTrue(manager.save_config_data({"bucket_name": "b2"}))
+                self.assertEqual(mock_derive.call_count, 1)
+
+                manager._set_master_password("otra-clave")
+                with patch.object(manager.security, "_derive_key", wraps=manager.security._derive_key) as mock_derive:
+                    self.assertTrue(manager.save_config_data({"bucket_name": "b3"}))
+                self.assertEqual(mock_derive.call_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
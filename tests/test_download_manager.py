@@ -29,7 +29,6 @@ class TestDownloadManager(unittest.TestCase):
         parent.cloud_manager = cloud_manager
         parent.resolve_driver_backend = MagicMock(return_value=cloud_manager)
         parent.progress_bar = MagicMock()
-        parent.statusBar.return_value = MagicMock()
         parent.on_download_error = MagicMock()
         parent.on_download_finished = MagicMock()
         parent.on_upload_error = MagicMock()
@@ -1,6 +1,6 @@
 import tempfile
+import time
 import unittest
-from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -24,7 +24,6 @@ class TestEventHandlers(unittest.TestCase):
         main.drivers_tab = MagicMock()
         main.download_manager = MagicMock()
         main.progress_bar = MagicMock()
-        main.statusBar.return_value = MagicMock()
         main.history = MagicMock()
         main.installer = MagicMock()
         main.refresh_history_view = MagicMock()
@@ -35,6 +34,15 @@ class TestEventHandlers(unittest.TestCase):
         main.user_manager = MagicMock()
         return main
 
+    def _set_r2_inputs(self, main, account_id, access_key, secret_key, bucket_name, history_api_url):
+        main.admin_tab.configure_mock(**{
+            "admin_account_id_input.text.return_value": account_id,
+            "admin_access_key_input.text.return_value": access_key,
+            "admin_secret_key_input.text.return_value": secret_key,
+            "admin_bucket_name_input.text.return_value": bucket_name,
+            "admin_history_api_url_input.text.return_value": history_api_url,
+        })
+
     def test_on_driver_selected_sets_details_and_enables_buttons(self):
         main = self._build_main()
         handler = EventHandlers(main)
@@ -92,7 +100,7 @@ class TestEventHandlers(unittest.TestCase):
     def test_handle_installation_error_logs_failed_installation(self, mock_warning):
         main = self._build_main()
         handler = EventHandlers(main)
-        main.installation_start_time = datetime.now()
+        main.installation_start_time = time.monotonic() - 5
 
         driver = {"brand": "Zebra", "version": "1.2.3", "description": "desc"}
         error = InstallationError("Error 740 elevation required")
@@ -109,6 +117,7 @@ class TestEventHandlers(unittest.TestCase):
         self.assertEqual(kwargs["status"], "failed")
         self.assertEqual(kwargs["driver_brand"], "Zebra")
         self.assertIn("740", kwargs["error_message"])
+        self.assertGreaterEqual(kwargs["installation_time"], 5)
         main.refresh_history_view.assert_called_once()
         mock_warning.assert_called_once()
 
@@ -118,11 +127,7 @@ class TestEventHandlers(unittest.TestCase):
         handler = EventHandlers(main)
 
         main.user_manager.current_user = None
-        main.admin_tab.admin_account_id_input.text.return_value = "a"
-        main.admin_tab.admin_access_key_input.text.return_value = "b"
-        main.admin_tab.admin_secret_key_input.text.return_value = "c"
-        main.admin_tab.admin_bucket_name_input.text.return_value = "d"
-        main.admin_tab.admin_history_api_url_input.text.return_value = "e"
+        self._set_r2_inputs(main, "a", "b", "c", "d", "e")
 
         handler.save_r2_config()
 
@@ -135,16 +140,14 @@ class TestEventHandlers(unittest.TestCase):
         handler = EventHandlers(main)
 
         main.user_manager.current_user = {"role": "admin", "username": "alice"}
-        main.admin_tab.admin_account_id_input.text.return_value = "a"
-        main.admin_tab.admin_access_key_input.text.return_value = "b"
-        main.admin_tab.admin_secret_key_input.text.return_value = "c"
-        main.admin_tab.admin_bucket_name_input.text.return_value = "d"
-        main.admin_tab.admin_history_api_url_input.text.return_value = "e"
+        self._set_r2_inputs(main, "a", "b", "c", "d", "e")
 
         handler.save_r2_config()
 
         mock_warning.assert_called_once()
         main.config_manager.save_config_data.assert_not_called()
+        main.admin_tab.admin_account_id_input.text.assert_not_called()
+        main.admin_tab.admin_secret_key_input.text.assert_not_called()
 
     @patch("handlers.event_handlers.QMessageBox.information")
     def test_save_r2_config_persists_and_reconnects_for_super_admin(self, mock_info):
@@ -152,11 +155,7 @@ class TestEventHandlers(unittest.TestCase):
         handler = EventHandlers(main)
 
         main.user_manager.current_user = {"role": "super_admin", "username": "root"}
-        main.admin_tab.admin_account_id_input.text.return_value = "acc"
-        main.admin_tab.admin_access_key_input.text.return_value = "key"
-        main.admin_tab.admin_secret_key_input.text.return_value = "secret"
-        main.admin_tab.admin_bucket_name_input.text.return_value = "bucket"
-        main.admin_tab.admin_history_api_url_input.text.return_value = "https://api.example.com"
+        self._set_r2_inputs(main, "acc", "key", "secret", "bucket", "https://api.example.com")
         main.config_manager.save_config_data.return_value = True
 
         handler.save_r2_config()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from managers.history_installations_client import HistoryInstallationsClient
 
@@ -30,6 +30,14 @@ class TestHistoryInstallationsClient(unittest.TestCase):
         self.assertEqual(payload["os_info"], "Windows")
         self.request.assert_called_once_with("post", "installations", json=payload)
 
+    def test_post_installation_payload_sends_payload_as_is(self):
+        payload = {"driver_brand": "Zebra", "status": "success"}
+
+        self.client.post_installation_payload(payload)
+
+        self.request.assert_called_once_with("post", "installations", json=payload)
+        self.assertIs(self.request.call_args.kwargs["json"], payload)
+
     def test_create_manual_record_returns_record(self):
         self.request.return_value = {"record": {"id": 123}}
 
@@ -73,5 +81,34 @@ class TestHistoryInstallationsClient(unittest.TestCase):
         self.assertEqual(self.request.call_count, 2)
 
 
+    def test_iter_installation_pages_follows_next_cursor(self):
+        first_page = MagicMock(content=b'[{"id": 2}, {"id": 1}]', headers={"X-Next-Cursor": "c1"})
+        last_page = MagicMock(content=b'[{"id": 0}]', headers={})
+        sent_params = []
+
+        def _request(method, endpoint, params=None, expect_json=True):
+            sent_params.append(dict(params))
+            return first_page if len(sent_params) == 1 else last_page
+
+        self.request.side_effect = _request
+
+        pages = list(self.client.iter_installation_pages(params={"start_date": "2026-01-01"}))
+
+        self.assertEqual(pages, [[{"id": 2}, {"id": 1}], [{"id": 0}]])
+        self.assertEqual(sent_params[0], {"start_date": "2026-01-01", "limit": 500})
+        self.assertEqual(sent_params[1]["cursor"], "c1")
+
+    def test_iter_installation_pages_warns_when_cursor_repeats(self):
+        page = MagicMock(content=b'[{"id": 1}]', headers={"X-Next-Cursor": "c1"})
+        self.request.return_value = page
+
+        with patch("managers.history_installations_client.logger") as mock_logger:
+            pages = list(self.client.iter_installation_pages())
+
+        self.assertEqual(pages, [[{"id": 1}], [{"id": 1}]])
+        mock_logger.warning.assert_called_once()
+        self.assertEqual(mock_logger.warning.call_args.kwargs["cursor"], "c1")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -59,11 +59,10 @@ class TestInstallationHistory(unittest.TestCase):
 
         self.assertEqual(history.api_url, "https://api.example.com")
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     def test_make_request_success_returns_json(self, mock_request):
         mock_response = MagicMock()
         mock_response.content = b'{"ok": true}'
-        mock_response.json.return_value = {"ok": True}
         mock_response.raise_for_status.return_value = None
         mock_request.return_value = mock_response
 
@@ -93,18 +92,17 @@ class TestInstallationHistory(unittest.TestCase):
         with self.assertRaises(ConnectionError):
             history._make_request("get", "installations")
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     def test_make_request_raises_connection_error(self, mock_request):
         mock_request.side_effect = Exception("boom")
 
         with self.assertRaises(ConnectionError):
             self.history._make_request("get", "installations")
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     def test_make_request_post_json_sends_utf8_bytes_payload(self, mock_request):
         mock_response = MagicMock()
         mock_response.content = b'{"ok": true}'
-        mock_response.json.return_value = {"ok": True}
         mock_response.raise_for_status.return_value = None
         mock_request.return_value = mock_response
 
@@ -118,7 +116,7 @@ class TestInstallationHistory(unittest.TestCase):
         expected = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
         self.assertEqual(sent_data, expected)
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     @patch.dict(os.environ, {"DRIVER_MANAGER_DESKTOP_AUTH_MODE": "web"}, clear=False)
     def test_make_request_web_mode_uses_bearer_and_web_prefix(self, mock_request):
         mock_config = MagicMock()
@@ -129,7 +127,6 @@ class TestInstallationHistory(unittest.TestCase):
 
         mock_response = MagicMock()
         mock_response.content = b'{"ok": true}'
-        mock_response.json.return_value = {"ok": True}
         mock_response.raise_for_status.return_value = None
         mock_request.return_value = mock_response
 
@@ -152,7 +149,7 @@ class TestInstallationHistory(unittest.TestCase):
         with self.assertRaises(ConnectionError):
             history._make_request("get", "installations")
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     @patch.dict(os.environ, {"DRIVER_MANAGER_DESKTOP_AUTH_MODE": "web"}, clear=False)
     def test_make_request_web_mode_invalid_session_notifies_handler_and_requires_relogin(
         self,
@@ -423,6 +420,8 @@ class TestInstallationHistory(unittest.TestCase):
         self.assertEqual(stats["successful_installations"], 1)
         self.assertEqual(stats["failed_installations"], 1)
         self.assertEqual(stats["unique_clients"], 2)
+        self.assertEqual(stats["success_rate"], 50.0)
+        self.assertEqual(stats["average_time_minutes"], 1.0)
         mock_get_installations.assert_called_once()
 
     @patch.object(InstallationHistory, "_make_request")
@@ -457,6 +456,30 @@ class TestInstallationHistory(unittest.TestCase):
 
         self.assertEqual([item["id"] for item in installations], [1])
 
+    @patch.object(InstallationHistory, "_make_request")
+    def test_get_installations_without_limit_reads_every_page(self, mock_make_request):
+        first_page = MagicMock(
+            content=json.dumps([
+                {"id": 2, "timestamp": "2026-07-20T10:00:00", "status": "success"},
+                {"id": 1, "timestamp": "2026-07-15T10:00:00", "status": "success"},
+            ]).encode("utf-8"),
+            headers={"X-Next-Cursor": "2026-07-15|1"},
+        )
+        last_page = MagicMock(
+            content=json.dumps([
+                {"id": 0, "timestamp": "2025-06-30T10:00:00", "status": "failed"},
+            ]).encode("utf-8"),
+            headers={},
+        )
+        mock_make_request.side_effect = [first_page, last_page]
+
+        installations = self.history.get_installations(start_date="2026-07-01T00:00:00")
+
+        self.assertEqual([item["id"] for item in installations], [2, 1])
+        self.assertEqual(mock_make_request.call_count, 2)
+        self.assertEqual(mock_make_request.call_args.kwargs["params"]["cursor"], "2026-07-15|1")
+        self.assertFalse(mock_make_request.call_args.kwargs["expect_json"])
+
     @patch.object(InstallationHistory, "_make_request")
     def test_get_statistics_with_date_filters_calls_worker_statistics_endpoint(
         self, mock_make_request
@@ -1,4 +1,5 @@
 import shutil
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -9,16 +10,13 @@ from managers.user_manager_v2 import UserManagerV2
 
 class TestTimestampRegressionIntegration(unittest.TestCase):
     def setUp(self):
-        self.test_dir = Path("tests/temp_integration")
-        self.test_dir.mkdir(parents=True, exist_ok=True)
-
-    def tearDown(self):
-        if self.test_dir.exists():
-            shutil.rmtree(self.test_dir)
+        self.test_dir = Path(tempfile.mkdtemp(prefix="temp_integration_"))
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
 
     def test_local_and_api_logs_use_timestamp_key_even_if_api_sends_legacy_typo(self):
         manager_local = UserManagerV2(local_mode=True)
         manager_local.config_dir = self.test_dir
+        self.addCleanup(manager_local.flush_pending_logs)
         manager_local.logs_file = self.test_dir / "access_logs.json"
         manager_local.current_user = {"username": "admin", "role": "super_admin"}
 
@@ -67,7 +65,7 @@ class TestPathTraversalRegressionIntegration(unittest.TestCase):
         self.mock_config.load_config_data.return_value = {"api_url": "https://api.example.com/"}
         self.history = InstallationHistory(self.mock_config)
 
-    @patch("managers.history_request_adapter.requests.request")
+    @patch("managers.history_request_adapter.requests.Session.request")
     def test_malicious_record_id_is_rejected_before_building_any_request_url(self, mock_request):
         result_get = self.history.get_installation_by_id("../../audit-logs")
         result_update = self.history.update_installation_details("../../audit-logs", "nota", "1.5")
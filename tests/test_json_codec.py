@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch
+
+from core import json_codec
+
+
+class TestJsonCodec(unittest.TestCase):
+    def test_roundtrip_returns_bytes_and_tolerates_bom(self):
+        payload = {"logs": [{"action": "login", "username": "señor"}], "created_at": "2026-01-01"}
+
+        encoded = json_codec.dumps(payload, indent=True)
+
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json_codec.loads(b"\xef\xbb\xbf" + encoded), payload)
+        self.assertEqual(json_codec.loads("\ufeff" + json_codec.dumps_str(payload)), payload)
+
+    def test_stdlib_fallback_matches_bytes_api(self):
+        payload = {"users": {"admin": {"active": True}}}
+
+        with patch.object(json_codec, "orjson", None):
+            encoded = json_codec.dumps(payload)
+            decoded = json_codec.loads(encoded)
+            self.assertEqual(json_codec.loads(b"\xef\xbb\xbf" + encoded), payload)
+
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(decoded, payload)
+        self.assertNotIn(b" ", encoded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -93,7 +93,7 @@ class TestReportGenerator(unittest.TestCase):
 
     def test_generate_monthly_report_uses_fallback_when_history_returns_none(self):
         history = MagicMock()
-        history.get_installations.return_value = None
+        history.iter_installations.return_value = iter([])
         history.get_statistics.return_value = None
         history.list_entity_technician_assignments.return_value = []
         generator = ReportGenerator(history)
@@ -175,7 +175,7 @@ class TestReportGenerator(unittest.TestCase):
 
     def test_generate_yearly_report_creates_output_file(self):
         history = MagicMock()
-        history.get_installations.return_value = self._sample_installations()
+        history.iter_installations.return_value = iter(self._sample_installations())
         history.get_statistics.return_value = self._sample_stats()
         history.list_entity_technician_assignments.return_value = []
         generator = ReportGenerator(history)
@@ -197,10 +197,157 @@ class TestReportGenerator(unittest.TestCase):
         finally:
             self._cleanup_file(output)
 
-    def test_installations_sheet_prefers_structured_assignment_display_name(self):
+    def test_monthly_report_keeps_styles_and_layout_in_streaming_mode(self):
+        installations = self._sample_installations()
+        installations.append(dict(installations[0], id=103, client_name="Cliente C"))
+        history = MagicMock()
+        history.iter_installations.return_value = iter(installations)
+        history.get_statistics.return_value = self._sample_stats()
+        history.list_entity_technician_assignments.return_value = []
+        generator = ReportGenerator(history)
+
+        output = self._temp_xlsx_path("monthly_styles")
+        try:
+            generator.generate_monthly_report(2026, 2, output_path=output)
+            wb = openpyxl.load_workbook(output)
+            try:
+                summary = wb["Resumen"]
+                self.assertIn("A1:D1", {str(rng) for rng in summary.merged_cells.ranges})
+                self.assertEqual(summary["A12"].value, "Driver")
+                self.assertEqual(summary["A13"].value, "Zebra 1.2.3")
+
+                ws = wb["Instalaciones"]
+                self.assertEqual(ws["A1"].font.color.rgb, "00FFFFFF")
+                self.assertEqual(ws["F2"].fill.start_color.rgb, "00C6EFCE")
+                self.assertEqual(ws["F3"].fill.start_color.rgb, "00FFC7CE")
+                self.assertEqual(ws["F4"].value, "Exitosa")
+                self.assertEqual(ws["F4"].fill.start_color.rgb, "00C6EFCE")
+                self.assertEqual(ws["B4"].value, "Cliente C")
+                self.assertEqual(ws["A2"].value, "13/02/2026 10:00")
+                self.assertEqual(ws.column_dimensions["I"].width, 40)
+                charts = wb["Gráficos"]._charts
+                self.assertEqual(len(charts), 1)
+                self.assertEqual(charts[0].series[0].val.numRef.f, "'Gráficos'!$B$3:$B$4")
+                self.assertEqual(charts[0].series[0].cat.numRef.f, "'Gráficos'!$A$3:$A$4")
+            finally:
+                wb.close()
+        finally:
+            self._cleanup_file(output)
+
+    def test_daily_report_keeps_styles_and_layout_in_streaming_mode(self):
+        history = MagicMock()
+        history.get_installations.return_value = self._sample_installations()
+        history.get_statistics.return_value = self._sample_stats()
+        generator = ReportGenerator(history)
+
+        output = self._temp_xlsx_path("daily_styles")
+        try:
+            generator.generate_daily_report(date=datetime(2026, 2, 13), output_path=output)
+            wb = openpyxl.load_workbook(output)
+            try:
+                ws = wb["Reporte Diario"]
+                self.assertIn("A1:D1", {str(rng) for rng in ws.merged_cells.ranges})
+                self.assertEqual(ws["A5"].value, "Fallidas:")
+                self.assertEqual(ws["B4"].font.color.rgb, "00008000")
+                self.assertEqual(ws["A7"].value, "Hora")
+                self.assertEqual(ws["A7"].fill.start_color.rgb, "00366092")
+                self.assertEqual(ws["E8"].value, "✓")
+                self.assertTrue(ws["E8"].font.bold)
+                self.assertEqual(ws["E9"].value, "✗")
+                self.assertEqual(ws["E9"].font.color.rgb, "00FF0000")
+                self.assertEqual(ws.column_dimensions["G"].width, 40)
+            finally:
+                wb.close()
+        finally:
+            self._cleanup_file(output)
+
+    def test_clients_sheet_aggregates_installations_per_client(self):
+        installations = self._sample_installations()
+        installations.append(dict(installations[1], id=103, client_name="Cliente A"))
+        installations.append(dict(installations[0], id=104, client_name=None))
+        history = MagicMock()
+        # Un iterador de un solo uso: ambas hojas deben salir de la misma pasada
+        history.iter_installations.return_value = iter(installations)
+        history.get_statistics.return_value = self._sample_stats()
+        history.list_entity_technician_assignments.return_value = []
+        generator = ReportGenerator(history)
+
+        output = self._temp_xlsx_path("monthly_clients")
+        try:
+            generator.generate_monthly_report(2026, 2, output_path=output)
+            wb = openpyxl.load_workbook(output, read_only=True, data_only=True)
+            try:
+                rows = list(wb["Por Cliente"].iter_rows(min_row=2, values_only=True))
+                detail_rows = list(wb["Instalaciones"].iter_rows(min_row=2, values_only=True))
+            finally:
+                wb.close()
+        finally:
+            self._cleanup_file(output)
+
+        self.assertEqual(len(detail_rows), 4)
+        history.get_installations.assert_not_called()
+        history.iter_installations.assert_called_once_with(
+            start_date="2026-02-01T00:00:00",
+            end_date="2026-03-01T00:00:00",
+        )
+
+        self.assertEqual(rows[0][:5], ("Cliente A", 2, 1, 1, "50.0%"))
+        self.assertEqual(set(rows[0][5].split(", ")), {"Zebra 1.2.3", "Magicard 2.0.0"})
+        self.assertEqual(
+            {row[0]: row[1:5] for row in rows[1:]},
+            {"Cliente B": (1, 0, 1, "0.0%"), "Sin nombre": (1, 1, 0, "100.0%")},
+        )
+
+    def test_rankings_are_sorted_and_capped(self):
+        stats = self._sample_stats()
+        stats["top_drivers"] = {f"Driver {index}": index for index in range(15)}
+        stats["by_brand"] = {"Zebra": 1, "Magicard": 3}
+        history = MagicMock()
+        history.iter_installations.return_value = iter([])
+        history.get_statistics.return_value = stats
+        generator = ReportGenerator(history)
+
+        output = self._temp_xlsx_path("monthly_rankings")
+        try:
+            generator.generate_monthly_report(2026, 2, output_path=output)
+            wb = openpyxl.load_workbook(output, read_only=True, data_only=True)
+            try:
+                summary_rows = list(wb["Resumen"].iter_rows(values_only=True))
+                chart_rows = list(wb["Gráficos"].iter_rows(min_row=3, values_only=True))
+            finally:
+                wb.close()
+        finally:
+            self._cleanup_file(output)
+
+        header_index = summary_rows.index(("Driver", "Cantidad"))
+        drivers = summary_rows[header_index + 1:]
+        self.assertEqual(len(drivers), ReportGenerator.TOP_DRIVERS_LIMIT)
+        self.assertEqual(drivers[0], ("Driver 14", 14))
+        self.assertEqual(drivers[-1], ("Driver 5", 5))
+        self.assertEqual(chart_rows, [("Magicard", 3), ("Zebra", 1)])
+
+    def test_report_creates_missing_output_directory(self):
         history = MagicMock()
         history.get_installations.return_value = self._sample_installations()
         history.get_statistics.return_value = self._sample_stats()
+        history.list_entity_technician_assignments.return_value = []
+        generator = ReportGenerator(history)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = Path(temp_dir) / "Downloads" / "daily.xlsx"
+            result = generator.generate_daily_report(datetime(2026, 2, 13), output_path=output)
+
+            self.assertEqual(result, str(output))
+            wb = openpyxl.load_workbook(output, read_only=True)
+            try:
+                self.assertEqual(wb.sheetnames, ["Reporte Diario"])
+            finally:
+                wb.close()
+
+    def test_installations_sheet_prefers_structured_assignment_display_name(self):
+        history = MagicMock()
+        history.iter_installations.return_value = iter(self._sample_installations())
+        history.get_statistics.return_value = self._sample_stats()
 
         def _assignments(entity_type, entity_id, include_inactive=False):
             if entity_type == "installation" and int(entity_id) == 101:
@@ -230,7 +377,7 @@ class TestReportGenerator(unittest.TestCase):
 
     def test_assignment_name_cache_resets_between_report_runs(self):
         history = MagicMock()
-        history.get_installations.return_value = self._sample_installations()
+        history.iter_installations.side_effect = lambda **_filters: iter(self._sample_installations())
         history.get_statistics.return_value = self._sample_stats()
 
         assignment_names = ["Tecnico Uno", "Tecnico Dos"]
@@ -161,6 +161,36 @@ class TestReportHandlers(unittest.TestCase):
         self.assertTrue(DummyMessageBox.information_calls)
         self.assertEqual(main._status_bar.messages[-1], "Sin datos para reporte diario")
 
+    def test_format_audit_log_entry_builds_export_block(self):
+        handlers = ReportHandlers(DummyMain())
+
+        entry = handlers._format_audit_log_entry(
+            {
+                "timestamp": "2026-02-13T10:00:00",
+                "username": "admin",
+                "action": "delete_driver",
+                "success": False,
+                "details": {"brand": "Zebra"},
+                "system_info": {"computer_name": "PC1", "ip": "10.0.0.5"},
+            }
+        )
+
+        self.assertEqual(
+            entry.splitlines(),
+            [
+                "Fecha: 13/02/2026 10:00:00",
+                "Usuario: admin",
+                "Acción: delete_driver",
+                "Resultado: ERROR",
+                'Detalles: {"brand": "Zebra"}',
+                "Computadora: PC1",
+                "IP: 10.0.0.5",
+                "Plataforma: N/A",
+                "-" * 80,
+                "",
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
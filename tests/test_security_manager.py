@@ -5,6 +5,9 @@ import hashlib
 from pathlib import Path
 from unittest.mock import patch
 
+from cryptography.fernet import Fernet
+
+from core import security_manager
 from core.security_manager import CloudDataEncryption, SecurityManager
 
 
@@ -37,6 +40,18 @@ class TestSecurityManager(unittest.TestCase):
 
         self.assertEqual(decrypted, original)
 
+    def test_build_fernet_prefers_rust_backend_and_falls_back_to_cryptography(self):
+        key = Fernet.generate_key()
+
+        with patch("core.security_manager.RustFernet", None):
+            cipher = security_manager.build_fernet(key)
+        self.assertIsInstance(cipher, Fernet)
+        self.assertEqual(cipher.decrypt(cipher.encrypt(b"payload")), b"payload")
+
+        with patch("core.security_manager.RustFernet") as mock_rust_fernet:
+            security_manager.build_fernet(key)
+        mock_rust_fernet.assert_called_once_with(key.decode("ascii"))
+
     def test_hmac_validation_true_and_false(self):
         manager = self._new_manager()
         manager.initialize_master_key("pass123")
@@ -57,6 +72,18 @@ class TestSecurityManager(unittest.TestCase):
 
         self.assertEqual(decrypted, original)
 
+    def test_encrypt_config_file_without_password_reuses_active_key(self):
+        manager = self._new_manager()
+        config_file = self.config_path / "config.enc"
+        self.assertFalse(manager.encrypt_config_file({"x": 1}, file_path=config_file))
+
+        self.assertTrue(manager.encrypt_config_file({"x": 1}, "pass123", file_path=config_file))
+        with patch.object(manager, "_derive_key", wraps=manager._derive_key) as mock_derive:
+            self.assertEqual(manager.decrypt_config_file("pass123", file_path=config_file), {"x": 1})
+            self.assertTrue(manager.encrypt_config_file({"x": 2}, file_path=config_file))
+        self.assertEqual(mock_derive.call_count, 1)
+        self.assertEqual(manager.decrypt_config_file("pass123", file_path=config_file), {"x": 2})
+
     def test_decrypt_config_file_returns_none_when_hmac_is_tampered(self):
         manager = self._new_manager()
         config_file = self.config_path / "config.enc"
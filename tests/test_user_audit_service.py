@@ -43,6 +43,50 @@ class TestUserAuditService(unittest.TestCase):
         self.assertEqual(entry["details"], {"ip": "10.0.0.1"})
         self.assertEqual(entry["system_info"]["computer_name"], "PC-01")
 
+    def test_merge_logs_keeps_only_the_most_recent_entries(self):
+        max_entries = self.service.MAX_LOG_ENTRIES
+        existing = [{"action": f"event_{index}"} for index in range(max_entries)]
+
+        merged = self.service._merge_logs_preserving_order(existing, [{"action": "newest"}])
+
+        self.assertEqual(len(merged), max_entries)
+        self.assertEqual(merged[0]["action"], "event_1")
+        self.assertEqual(merged[-1]["action"], "newest")
+        self.assertEqual(self.service._serializable_logs_data({"logs": merged})["logs"][-1], {"action": "newest"})
+
+    def test_normalize_logs_data_skips_already_normalized_payload(self):
+        normalized = self.service._normalize_logs_data({"access_logs": [{"action": "login"}]})
+
+        self.assertIs(self.service._normalize_logs_data(normalized), normalized)
+        self.assertEqual(list(normalized["logs"]), [{"action": "login"}])
+        self.assertIn("created_at", normalized)
+
+    def test_get_access_logs_legacy_returns_only_the_requested_tail(self):
+        self.owner.current_user = {"username": "admin", "role": "super_admin"}
+        self.owner.audit_api_client = None
+        self.service._load_logs_data = MagicMock(
+            return_value=self.service._normalize_logs_data(
+                {"logs": [{"action": f"event_{index}"} for index in range(10)]}
+            )
+        )
+
+        logs = self.service.get_access_logs(limit=3)
+
+        self.assertEqual([entry["action"] for entry in logs], ["event_7", "event_8", "event_9"])
+        self.assertEqual(len(self.service.get_access_logs(limit=50)), 10)
+
+    def test_persist_logs_data_skips_upload_when_content_is_unchanged(self):
+        self.owner.cloud_encryption = None
+        logs_data = self.service._normalize_logs_data({"logs": [{"action": "login"}], "created_at": "2026-01-01"})
+
+        self.service._persist_logs_data(logs_data)
+        self.service._persist_logs_data(dict(logs_data))
+        self.assertEqual(self.owner.cloud_manager.upload_file_content.call_count, 1)
+
+        logs_data["logs"].append({"action": "logout"})
+        self.service._persist_logs_data(logs_data)
+        self.assertEqual(self.owner.cloud_manager.upload_file_content.call_count, 2)
+
     def test_get_access_logs_prefers_audit_api_and_returns_ascending_order(self):
         self.owner.current_user = {"username": "admin", "role": "super_admin"}
         self.owner.audit_api_client._make_request.return_value = [
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock
 
+from core.exceptions import ValidationError
 from managers.user_management_service import UserManagementService
 
 
@@ -43,8 +44,15 @@ class TestUserManagementService(unittest.TestCase):
         created_user = saved_payload["users"]["admin_user"]
         self.assertEqual(created_user["permissions"], ["read", "write"])
         self.assertEqual(created_user["full_name"], "Admin User")
+        self.assertEqual(created_user["created_at"], created_user["last_password_change"])
         self.owner._log_access.assert_called_once()
 
+    def test_create_user_rejects_username_with_trailing_newline(self):
+        with self.assertRaises(ValidationError):
+            self.service.create_user("admin_user\n", "Q4@rZ8!kP1#sM7t", role="admin")
+
+        self.owner._save_users.assert_not_called()
+
     def test_change_password_updates_history_and_metadata(self):
         self.owner._load_users.return_value = {
             "users": {
@@ -1,9 +1,15 @@
+import gc
 import unittest
+import weakref
 from unittest.mock import MagicMock
 from unittest.mock import patch
+import bcrypt
+import hashlib
 import json
 import shutil
+import tempfile
 from pathlib import Path
+from collections import deque
 
 from core.exceptions import CloudStorageError, SecurityError
 from managers.user_manager_v2 import UserManagerV2
@@ -23,8 +29,9 @@ class StubAuditApiClient:
 
 class TestUserManagerV2(unittest.TestCase):
     def setUp(self):
-        self.test_dir = Path("tests/temp_config")
-        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.test_dir = Path(tempfile.mkdtemp(prefix="temp_config_"))
+        # Registrado primero: corre al final, despues de vaciar los buffers de cada manager
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
         self.superadmin_password = "N7!xTq4#Lm2@Vp9"
         self.admin_password = "Q4@rZ8!kP1#sM7t"
         self.viewer_password = "B9!wX3@hN6#yR2c"
@@ -41,8 +48,8 @@ class TestUserManagerV2(unittest.TestCase):
         self.user_manager.logs_file = self.test_dir / "access_logs.json"
 
     def tearDown(self):
-        if self.test_dir.exists():
-            shutil.rmtree(self.test_dir)
+        self.user_manager.flush_pending_logs()
+        self.user_manager.flush_pending_users()
 
     def test_initialize_system(self):
         success, message = self.user_manager.initialize_system("superadmin", self.superadmin_password)
@@ -78,6 +85,24 @@ class TestUserManagerV2(unittest.TestCase):
         self.assertFalse(success)
         self.assertIn("Usuario o contrase", message)
 
+    def test_authenticate_defers_last_login_save_until_flush(self):
+        self.user_manager.initialize_system("superadmin", self.superadmin_password)
+
+        with patch.object(self.user_manager, "_save_users", wraps=self.user_manager._save_users) as mock_save:
+            success, _ = self.user_manager.authenticate("superadmin", self.superadmin_password)
+            self.assertTrue(success)
+            mock_save.assert_not_called()
+
+            last_login = self.user_manager.current_user["last_login"]
+            self.assertEqual(self.user_manager._load_users()["users"]["superadmin"]["last_login"], last_login)
+
+            self.user_manager.logout()
+            mock_save.assert_called_once()
+
+        with open(self.user_manager.users_file, "r") as f:
+            self.assertEqual(json.load(f)["users"]["superadmin"]["last_login"], last_login)
+        self.assertTrue(self.user_manager.flush_pending_users())
+
     @patch("managers.user_auth_provider.requests.post")
     def test_authenticate_web_mode_success(self, mock_post):
         audit_api = MagicMock()
@@ -88,6 +113,7 @@ class TestUserManagerV2(unittest.TestCase):
             auth_mode="web",
         )
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.logs_file = self.test_dir / "access_logs_web.json"
 
         response = MagicMock()
@@ -125,6 +151,7 @@ class TestUserManagerV2(unittest.TestCase):
             auth_mode="web",
         )
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.logs_file = self.test_dir / "access_logs_web_invalid.json"
 
         response = MagicMock()
@@ -268,6 +295,7 @@ class TestUserManagerV2(unittest.TestCase):
             auth_mode="web",
         )
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.logs_file = self.test_dir / "access_logs_web_invalid_remote.json"
         manager._append_legacy_log_entry = MagicMock(return_value=True)
 
@@ -342,6 +370,7 @@ class TestUserManagerV2(unittest.TestCase):
     def test_get_access_logs_returns_empty_when_not_authenticated(self):
         manager = UserManagerV2(local_mode=True)
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.logs_file = self.test_dir / "access_logs_empty_auth.json"
 
         logs = manager.get_access_logs(limit=50)
@@ -357,6 +386,7 @@ class TestUserManagerV2(unittest.TestCase):
             auth_mode="web",
         )
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.users_file = self.test_dir / "missing_users.json"
 
         self.assertTrue(manager.has_users())
@@ -390,6 +420,50 @@ class TestUserManagerV2(unittest.TestCase):
         success, _ = self.user_manager.authenticate("superadmin", self.superadmin_password)
         self.assertTrue(success)
 
+    def test_get_system_info_resolves_host_once_per_session(self):
+        with patch("managers.user_manager_v2.socket.gethostbyname", return_value="10.0.0.5") as mock_resolve:
+            first = self.user_manager._get_system_info()
+            first["ip"] = "mutated"
+            second = self.user_manager._get_system_info()
+
+        mock_resolve.assert_called_once()
+        self.assertEqual(second["ip"], "10.0.0.5")
+
+    def test_verify_password_legacy_pbkdf2_hash(self):
+        salt = "a" * 64
+        key = hashlib.pbkdf2_hmac("sha256", b"LegacyPass#2024", salt.encode("utf-8"), 100000)
+        legacy_hash = salt + key.hex()
+
+        self.assertTrue(self.user_manager._verify_password("LegacyPass#2024", legacy_hash))
+        self.assertFalse(self.user_manager._verify_password("WrongPass#2024", legacy_hash))
+        self.assertFalse(self.user_manager._verify_password_legacy("LegacyPass#2024", salt + "zz\u00f1"))
+
+    def test_check_password_history_verifies_each_distinct_hash_once(self):
+        validator = self.user_manager.password_validator
+        reused_hash = bcrypt.hashpw(b"Old#Password2024", bcrypt.gensalt(rounds=4)).decode("utf-8")
+        history = [reused_hash, reused_hash, None, "not-a-bcrypt-hash"]
+
+        with patch("managers.user_manager_v2.bcrypt.checkpw", wraps=bcrypt.checkpw) as mock_checkpw:
+            self.assertTrue(validator.check_password_history("New#Password2024", history))
+        self.assertEqual(mock_checkpw.call_count, 2)
+
+        self.assertFalse(validator.check_password_history("Old#Password2024", history))
+
+    def test_lockout_manager_caps_tracked_ip_addresses(self):
+        lockout_manager = self.user_manager.lockout_manager
+        lockout_manager.MAX_FAILED_ATTEMPTS = 1000
+
+        for index in range(lockout_manager.MAX_TRACKED_IPS + 10):
+            lockout_manager.record_failed_attempt("superadmin", f"10.0.0.{index}")
+        lockout_manager.record_failed_attempt("superadmin", "10.0.0.1")
+
+        tracked_ips = lockout_manager.failed_attempts["superadmin"]["ip_addresses"]
+        self.assertEqual(len(tracked_ips), lockout_manager.MAX_TRACKED_IPS)
+        self.assertIn("10.0.0.73", tracked_ips)
+
+        lockout_manager.record_successful_login("superadmin")
+        self.assertEqual(lockout_manager.failed_attempts["superadmin"]["ip_addresses"], set())
+
     def test_create_user_permissions(self):
         self.user_manager.initialize_system("superadmin", self.superadmin_password)
         self.user_manager.authenticate("superadmin", self.superadmin_password)
@@ -500,6 +574,7 @@ class TestUserManagerV2(unittest.TestCase):
         security = MagicMock()
         manager = UserManagerV2(cloud_manager=cloud, security_manager=security, local_mode=False)
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.cloud_encryption = MagicMock()
         manager.cloud_encryption.decrypt_cloud_data.return_value = {}
 
@@ -534,6 +609,7 @@ class TestUserManagerV2(unittest.TestCase):
         security = MagicMock()
         manager = UserManagerV2(cloud_manager=cloud, security_manager=security, local_mode=False)
         manager.config_dir = self.test_dir
+        self.addCleanup(manager.flush_pending_logs)
         manager.cloud_encryption = MagicMock()
         manager.cloud_encryption.decrypt_cloud_data.return_value = {}
 
@@ -672,12 +748,169 @@ class TestUserManagerV2(unittest.TestCase):
         with patch.object(manager, "_load_legacy_logs_data", side_effect=fake_load):
             with patch.object(manager, "_persist_logs_data", side_effect=fake_persist):
                 manager._log_access("login_success", "admin_root", True, {"role": "super_admin"})
+                self.assertEqual(persisted_payloads, [])
+                self.assertTrue(manager.flush_pending_logs())
 
         self.assertGreaterEqual(len(persisted_payloads), 2)
         final_actions = [entry["action"] for entry in persisted_payloads[-1]["logs"]]
         self.assertIn("concurrent_write", final_actions)
         self.assertIn("login_success", final_actions)
 
+    def test_log_access_legacy_buffers_until_batch_size(self):
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=MagicMock(), local_mode=False)
+        batch_size = manager.audit_service.LOG_FLUSH_BATCH_SIZE
+
+        with patch.object(manager, "_append_legacy_log_entries", return_value=True) as mock_append:
+            for index in range(batch_size - 1):
+                manager._log_access("login_success", f"user_{index}", True)
+            mock_append.assert_not_called()
+
+            manager._log_access("login_success", "last_user", True)
+            self.assertTrue(manager.flush_pending_logs())
+
+        mock_append.assert_called_once()
+        flushed_entries = mock_append.call_args[0][0]
+        self.assertEqual(len(flushed_entries), batch_size)
+        self.assertEqual(flushed_entries[-1]["username"], "last_user")
+        self.assertIsNone(manager.audit_service._log_flush_timer)
+        self.assertEqual(manager.audit_service._pending_log_flushes, [])
+
+    def test_flush_pending_logs_requeues_entries_when_persistence_fails(self):
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=MagicMock(), local_mode=False)
+
+        with patch.object(manager, "_append_legacy_log_entries", return_value=False):
+            manager._log_access("login_success", "admin_root", True)
+            self.assertFalse(manager.flush_pending_logs())
+
+        self.assertEqual(len(manager.audit_service._log_buffer), 1)
+        # El reintento queda programado aunque no lleguen logs nuevos.
+        self.assertIsNotNone(manager.audit_service._log_flush_timer)
+
+        with patch.object(manager, "_append_legacy_log_entries", return_value=True) as mock_append:
+            self.assertTrue(manager.flush_pending_logs())
+
+        self.assertEqual(mock_append.call_args[0][0][0]["username"], "admin_root")
+        self.assertEqual(len(manager.audit_service._log_buffer), 0)
+        self.assertIsNone(manager.audit_service._log_flush_timer)
+
+    def test_exit_hook_flushes_live_audit_services_without_retaining_them(self):
+        from managers import user_audit_service
+
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=MagicMock(), local_mode=False)
+        service = manager.audit_service
+        service_ref = weakref.ref(service)
+
+        with patch.object(manager, "_append_legacy_log_entries", return_value=True) as mock_append:
+            manager._log_access("login_success", "admin_root", True)
+            self.assertIn(service, user_audit_service._LIVE_AUDIT_SERVICES)
+            pending_timer = service._log_flush_timer
+            user_audit_service._flush_live_audit_services()
+
+        mock_append.assert_called_once()
+        # El timer cancelado retiene el servicio hasta que su hilo termina.
+        pending_timer.join()
+        del manager, service, pending_timer
+        gc.collect()
+        self.assertIsNone(service_ref())
+
+    def test_log_buffer_overflow_warns_with_dropped_entry_count(self):
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=MagicMock(), local_mode=False)
+        self.addCleanup(manager.flush_pending_logs)
+        service = manager.audit_service
+        service.LOG_BUFFER_MAX_ENTRIES = 2
+        service._log_buffer = deque(maxlen=2)
+
+        def fail_while_new_entry_arrives(_entries):
+            # Llega un log mientras el flush falla: al reencolar se supera el tope.
+            manager._log_access("login_failed", "during_flush", False)
+            return False
+
+        with patch.object(manager, "logger") as mock_logger:
+            manager._log_access("login_failed", "user_1", False)
+            manager._log_access("login_failed", "user_2", False)
+            with patch.object(manager, "_append_legacy_log_entries", side_effect=fail_while_new_entry_arrives):
+                self.assertFalse(manager.flush_pending_logs())
+
+            dropped_warnings = [
+                call.kwargs["dropped_entries"]
+                for call in mock_logger.warning.call_args_list
+                if "dropped_entries" in call.kwargs
+            ]
+            self.assertEqual(dropped_warnings, [1])
+
+            manager._log_access("login_failed", "user_3", False)
+            dropped_warnings = [
+                call.kwargs["dropped_entries"]
+                for call in mock_logger.warning.call_args_list
+                if "dropped_entries" in call.kwargs
+            ]
+            self.assertEqual(dropped_warnings, [1, 1])
+
+        with patch.object(manager, "_append_legacy_log_entries", return_value=True):
+            self.assertTrue(manager.flush_pending_logs())
+
+    def test_repair_access_logs_persists_while_holding_flush_lock(self):
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=MagicMock(), local_mode=False)
+        manager.current_user = {"username": "admin_root", "role": "super_admin"}
+        service = manager.audit_service
+        lock_held_on_persist = []
+
+        with patch.object(service, "_can_use_audit_api", return_value=False), patch.object(
+            service, "_load_logs_data", return_value={"logs": [{"action": "login_success"}]}
+        ), patch.object(
+            service,
+            "_persist_logs_data",
+            side_effect=lambda _data: lock_held_on_persist.append(service._log_flush_lock.locked()),
+        ):
+            success, _message = manager.repair_access_logs()
+
+        self.assertTrue(success)
+        self.assertEqual(lock_held_on_persist, [True])
+        self.assertFalse(service._log_flush_lock.locked())
+
+    def test_legacy_cloud_logs_reuse_cache_while_etag_is_unchanged(self):
+        stored = {"content": None}
+        cloud = MagicMock()
+        cloud.download_file_content.side_effect = lambda key, binary=False: (
+            stored["content"].encode("utf-8") if binary and stored["content"] else stored["content"]
+        )
+        cloud.upload_file_content.side_effect = lambda key, content, **kwargs: stored.update(content=content)
+        cloud.get_file_etag.side_effect = lambda key: (
+            hashlib.md5(stored["content"].encode("utf-8")).hexdigest() if stored["content"] else None
+        )
+        manager = UserManagerV2(cloud_manager=cloud, security_manager=None, local_mode=False)
+        manager.current_user = {"username": "admin_root", "role": "super_admin"}
+
+        manager._log_access("login_success", "admin_root", True)
+        self.assertTrue(manager.flush_pending_logs())
+        downloads_after_first_flush = cloud.download_file_content.call_count
+
+        manager._log_access("logout", "admin_root", True)
+        logs = manager.get_access_logs(limit=10)
+
+        self.assertEqual([entry["action"] for entry in logs], ["login_success", "logout"])
+        self.assertEqual(cloud.download_file_content.call_count, downloads_after_first_flush)
+
+        stored["content"] = json.dumps(
+            {"logs": [{"action": "remote_write", "username": "other"}], "created_at": "2026-01-01T00:00:00"}
+        )
+        self.assertEqual([entry["action"] for entry in manager.get_access_logs(limit=10)], ["remote_write"])
+        self.assertEqual(cloud.download_file_content.call_count, downloads_after_first_flush + 1)
+
+    def test_cloud_logs_content_detects_msgpack_blobs(self):
+        manager = UserManagerV2(cloud_manager=MagicMock(), security_manager=None, local_mode=False)
+        service = manager.audit_service
+
+        self.assertEqual(service._decode_cloud_logs_content(b'\xef\xbb\xbf{"logs": []}'), {"logs": []})
+        self.assertEqual(service._decode_cloud_logs_content('{"logs": []}'), {"logs": []})
+
+        with patch("managers.user_audit_service.msgpack") as mock_msgpack:
+            mock_msgpack.unpackb.return_value = {"logs": [{"action": "login"}]}
+            decoded = service._decode_cloud_logs_content(b"\x82\xa4logs\x90")
+
+        mock_msgpack.unpackb.assert_called_once_with(b"\x82\xa4logs\x90", raw=False)
+        self.assertEqual(decoded["logs"][0]["action"], "login")
+
     def test_get_access_logs_reads_from_audit_api_and_normalizes_payload(self):
         cloud = MagicMock()
         security = MagicMock()
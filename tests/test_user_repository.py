@@ -1,7 +1,13 @@
+import os
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+from core import json_codec
+
+from managers import user_repository
 from managers.user_repository import UserRepository
 
 
@@ -25,6 +31,17 @@ class TestUserRepository(unittest.TestCase):
         self.assertEqual(normalized["users"], {})
         self.assertEqual(normalized["version"], "2.1")
 
+    def test_normalize_users_data_keeps_canonical_payload(self):
+        payload = {"users": {"admin": {"username": "admin"}}, "created_at": "2026-01-01", "version": "2.1"}
+
+        self.assertIs(self.repo._normalize_users_data(payload), payload)
+
+    def test_normalize_users_data_rebuilds_legacy_user_list(self):
+        normalized = self.repo._normalize_users_data({"users": [{"username": "admin"}, {"role": "x"}]})
+
+        self.assertEqual(list(normalized["users"]), ["admin"])
+        self.assertIn("created_at", normalized)
+
     def test_cache_roundtrip_and_ttl_expiration(self):
         payload = {"users": {"admin": {"username": "admin"}}}
 
@@ -35,5 +52,68 @@ class TestUserRepository(unittest.TestCase):
         self.assertIsNone(self.repo._get_cached_users())
 
 
+    def test_expired_cache_is_reused_when_storage_version_is_unchanged(self):
+        self.owner.cloud_manager.get_file_etag.return_value = "etag-1"
+        self.repo._set_users_cache({"users": {"admin": {"username": "admin"}}}, "etag-1")
+
+        self.owner._cache_clock.return_value = 110.0
+        self.assertIn("admin", self.repo._get_cached_users()["users"])
+        self.assertEqual(self.owner._users_cache_loaded_at, 110.0)
+
+        self.owner._cache_clock.return_value = 120.0
+        self.owner.cloud_manager.get_file_etag.return_value = "etag-2"
+        self.assertIsNone(self.repo._get_cached_users())
+        self.assertIsNone(self.owner._users_cache_data)
+
+    def test_users_list_is_rebuilt_only_when_cache_changes(self):
+        self.repo._set_users_cache({"users": {"admin": {"username": "admin", "role": "admin"}}})
+        self.owner._load_users.side_effect = self.repo._get_cached_users
+
+        first = self.repo._get_users_list()
+        second = self.repo._get_users_list()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.owner._load_users.call_count, 1)
+
+        second[0]["role"] = "mutated"
+        self.repo._record_last_login("admin", "2026-01-02T10:00:00")
+        refreshed = self.repo._get_users_list()
+        self.assertEqual(self.owner._load_users.call_count, 2)
+        self.assertEqual(refreshed[0]["role"], "admin")
+        self.assertEqual(refreshed[0]["last_login"], "2026-01-02T10:00:00")
+        self.repo._users_flush_timer.cancel()
+
+    def test_pending_last_login_registers_repository_in_weak_exit_hook(self):
+        self.repo._record_last_login("admin", "2026-01-02T10:00:00")
+        self.addCleanup(self.repo._users_flush_timer.cancel)
+
+        self.assertIn(self.repo, user_repository._LIVE_USER_REPOSITORIES)
+        with patch.object(self.repo, "flush_pending_users") as mock_flush:
+            user_repository._flush_live_user_repositories()
+        mock_flush.assert_called_once_with()
+
+    def test_local_mode_load_users_reads_file_only_when_it_changes(self):
+        users_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, users_dir, ignore_errors=True)
+        self.owner.local_mode = True
+        self.owner.users_file = users_dir / "users.json"
+        self.owner.users_file.write_text(
+            '{"users": {"admin": {"username": "admin"}}, "created_at": "2026-01-01", "version": "2.1"}',
+            encoding="utf-8",
+        )
+
+        with patch("managers.user_repository.json_codec.loads", wraps=json_codec.loads) as mock_loads:
+            self.assertIn("admin", self.repo._load_users()["users"])
+            self.assertIn("admin", self.repo._load_users()["users"])
+            self.assertEqual(mock_loads.call_count, 1)
+
+            self.owner.users_file.write_text(
+                '{"users": {"viewer": {"username": "viewer"}}, "created_at": "2026-01-01", "version": "2.1"}',
+                encoding="utf-8",
+            )
+            os.utime(self.owner.users_file, ns=(1, 1))
+            self.assertIn("viewer", self.repo._load_users()["users"])
+            self.assertEqual(mock_loads.call_count, 2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,5 @@
 import shutil
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -33,8 +34,7 @@ class _FakeStreamResponse:
 
 class TestWebDriverManager(unittest.TestCase):
     def setUp(self):
-        self.test_dir = Path("tests/temp_web_driver_manager")
-        self.test_dir.mkdir(parents=True, exist_ok=True)
+        self.test_dir = Path(tempfile.mkdtemp(prefix="temp_web_driver_manager_"))
 
     def tearDown(self):
         if self.test_dir.exists():
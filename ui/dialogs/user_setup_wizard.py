@@ -2,8 +2,6 @@
 Initial user setup wizard for the first super admin account.
 """
 
-import re
-
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QDialog,
@@ -16,6 +14,7 @@ from PyQt6.QtWidgets import (
     QWizardPage,
 )
 
+from core.exceptions import is_valid_username
 from core.password_policy import PasswordPolicy
 from ui.theme_manager import resolve_theme_manager
 
@@ -182,7 +181,7 @@ class AdminAccountPage(QWizardPage):
                     "status-error",
                     "Muy corto. Debe tener al menos 3 caracteres.",
                 )
-            elif not re.match(r"^[a-zA-Z0-9_-]+$", username):
+            elif not is_valid_username(username):
                 _set_feedback_style(
                     self.username_hint,
                     "status-error",
@@ -270,7 +269,7 @@ class AdminAccountPage(QWizardPage):
             )
             return False
 
-        if not re.match(r"^[a-zA-Z0-9_-]+$", username):
+        if not is_valid_username(username):
             QMessageBox.warning(
                 self,
                 "Error",